@@ -0,0 +1,28 @@
+-- ============================================================
+-- Dependify 2.0 - Database Migration
+-- Add job_id and stage columns to repo-updates for idempotent upserts
+-- ============================================================
+-- Run this SQL in your Supabase SQL Editor
+-- ============================================================
+
+-- Add job_id column: one id per file per pipeline run
+ALTER TABLE "repo-updates"
+ADD COLUMN IF NOT EXISTS job_id UUID;
+
+-- Add stage column: reader, writer or verifier
+ALTER TABLE "repo-updates"
+ADD COLUMN IF NOT EXISTS stage TEXT;
+
+-- Unique key used by the backend's upsert (on_conflict=job_id,stage).
+-- Rows without a job_id (e.g. LOADING) are unaffected since NULLs never conflict.
+CREATE UNIQUE INDEX IF NOT EXISTS idx_repo_updates_job_id_stage
+ON "repo-updates"(job_id, stage);
+
+-- ============================================================
+-- Verification Query
+-- ============================================================
+-- SELECT job_id, stage, status, filename, created_at
+-- FROM "repo-updates"
+-- WHERE job_id IS NOT NULL
+-- ORDER BY created_at DESC
+-- LIMIT 10;
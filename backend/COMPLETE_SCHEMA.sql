@@ -5,14 +5,18 @@
 
 CREATE TABLE "repo-updates" (
   id BIGSERIAL PRIMARY KEY,
-  status TEXT,                              -- READING, WRITING, LOADING
+  status TEXT,                              -- READING, WRITING, VERIFYING, FIXING, VERIFIED, LOADING
   message TEXT,                             -- Human-readable status message
   code TEXT,                                -- Current/new code content
   created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
   
   -- NEW COLUMNS (add these via ADD_COLUMNS_TO_SUPABASE.sql)
   filename TEXT,                            -- e.g., "_app.js", "index.ts"
-  old_code TEXT                             -- Original code before refactoring
+  old_code TEXT,                            -- Original code before refactoring
+
+  -- Upsert key (add these via ADD_JOB_STAGE_TO_SUPABASE.sql)
+  job_id UUID,                              -- One id per file per pipeline run
+  stage TEXT                                -- reader, writer, verifier
 );
 
 -- Indexes for performance
@@ -20,6 +24,7 @@ CREATE INDEX IF NOT EXISTS idx_repo_updates_status ON "repo-updates"(status);
 CREATE INDEX IF NOT EXISTS idx_repo_updates_filename ON "repo-updates"(filename);
 CREATE INDEX IF NOT EXISTS idx_repo_updates_filename_status ON "repo-updates"(filename, status);
 CREATE INDEX IF NOT EXISTS idx_repo_updates_created_at ON "repo-updates"(created_at DESC);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_repo_updates_job_id_stage ON "repo-updates"(job_id, stage);
 
 -- Row Level Security
 ALTER TABLE "repo-updates" ENABLE ROW LEVEL SECURITY;
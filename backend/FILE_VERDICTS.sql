@@ -0,0 +1,28 @@
+-- ============================================================
+-- Dependify 2.0 - Stored Reader Verdicts
+-- Lets re-runs skip files whose content has not changed
+-- ============================================================
+-- Run this SQL in your Supabase SQL Editor
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS file_verdicts (
+  repo_url TEXT NOT NULL,                   -- Repository the file belongs to
+  path TEXT NOT NULL,                       -- Path relative to the repository root
+  content_sha256 TEXT NOT NULL,             -- SHA-256 of the file content analyzed
+  add BOOLEAN NOT NULL,                     -- Reader verdict: needs updating
+  reason TEXT,                              -- Reader explanation
+  range_of_interest JSONB,                  -- [start, end) region flagged in a large file
+  updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+  PRIMARY KEY (repo_url, path)
+);
+
+-- Tables created before range_of_interest was stored
+ALTER TABLE file_verdicts ADD COLUMN IF NOT EXISTS range_of_interest JSONB;
+
+-- Row Level Security
+ALTER TABLE file_verdicts ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Allow service role full access on file_verdicts"
+  ON file_verdicts FOR ALL
+  TO service_role
+  USING (true) WITH CHECK (true);
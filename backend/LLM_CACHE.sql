@@ -0,0 +1,32 @@
+-- ============================================================
+-- Dependify 2.0 - LLM Response Cache
+-- Exact-match cache for Reader/Writer/Verifier Anthropic calls
+-- ============================================================
+-- Run this SQL in your Supabase SQL Editor
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS llm_cache (
+  key TEXT PRIMARY KEY,                     -- sha256(model|prompt_version|request)
+  response JSONB NOT NULL,                  -- Serialized Anthropic Message
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Index on created_at for TTL filtering and cleanup
+CREATE INDEX IF NOT EXISTS idx_llm_cache_created_at
+ON llm_cache(created_at DESC);
+
+-- Row Level Security
+ALTER TABLE llm_cache ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Allow service role full access on llm_cache"
+  ON llm_cache FOR ALL
+  TO service_role
+  USING (true) WITH CHECK (true);
+
+-- ============================================================
+-- Maintenance
+-- ============================================================
+-- Entries older than 7 days are ignored by the backend (CACHE_TTL_DAYS
+-- in llm_cache.py). Purge them periodically with:
+-- DELETE FROM llm_cache
+-- WHERE created_at < NOW() - INTERVAL '7 days';
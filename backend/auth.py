@@ -3,7 +3,9 @@ Authentication module for Dependify backend.
 Handles GitHub OAuth and JWT token management.
 """
 import jwt
+import asyncio
 import httpx
+import hashlib
 from datetime import datetime, timedelta
 from typing import Optional, Dict
 from fastapi import HTTPException, Header, Depends
@@ -16,6 +18,17 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 24 hours
 
 security = HTTPBearer()
 
+# OAuth app credentials sent with every code exchange, built once
+_OAUTH_CREDENTIALS = {
+    "client_id": Config.GITHUB_CLIENT_ID,
+    "client_secret": Config.GITHUB_CLIENT_SECRET,
+}
+
+# sha256(code) -> exchange still in flight, so a double-submitted code is
+# only exchanged with GitHub once. Entries are dropped as soon as the
+# exchange finishes: a finished exchange is never handed to a later request
+_exchange_inflight: Dict[str, asyncio.Task] = {}
+
 
 class AuthService:
     """Service for handling authentication operations."""
@@ -70,12 +83,13 @@ class AuthService:
             raise HTTPException(status_code=401, detail="Invalid token")
 
     @staticmethod
-    async def exchange_github_code(code: str) -> Dict:
+    async def exchange_github_code(code: str, client: httpx.AsyncClient) -> Dict:
         """
         Exchange GitHub OAuth code for access token.
 
         Args:
             code: OAuth code from GitHub
+            client: Shared GitHub HTTP client
 
         Returns:
             GitHub access token and user info
@@ -86,49 +100,57 @@ class AuthService:
                 detail="GitHub OAuth not configured"
             )
 
-        # Exchange code for access token
-        async with httpx.AsyncClient() as client:
-            token_response = await client.post(
-                "https://github.com/login/oauth/access_token",
-                data={
-                    "client_id": Config.GITHUB_CLIENT_ID,
-                    "client_secret": Config.GITHUB_CLIENT_SECRET,
-                    "code": code,
-                },
-                headers={"Accept": "application/json"},
-            )
-
-            token_data = token_response.json()
+        key = hashlib.sha256(code.encode()).hexdigest()
+        # A concurrent retry of the same code shares the pending exchange
+        task = _exchange_inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(AuthService._exchange_github_code(code, client))
+            _exchange_inflight[key] = task
+            task.add_done_callback(lambda _: _exchange_inflight.pop(key, None))
+        # Shielded so one caller going away does not cancel it for the others
+        return await asyncio.shield(task)
 
-            if "error" in token_data:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"GitHub OAuth error: {token_data.get('error_description', 'Unknown error')}"
-                )
+    @staticmethod
+    async def _exchange_github_code(code: str, client: httpx.AsyncClient) -> Dict:
+        """Perform the GitHub code exchange and user lookup, uncached."""
+        # Exchange code for access token
+        token_response = await client.post(
+            "https://github.com/login/oauth/access_token",
+            data={**_OAUTH_CREDENTIALS, "code": code},
+            headers={"Accept": "application/json"},
+        )
 
-            access_token = token_data.get("access_token")
+        token_data = token_response.json()
 
-            # Get user information
-            user_response = await client.get(
-                "https://api.github.com/user",
-                headers={
-                    "Authorization": f"Bearer {access_token}",
-                    "Accept": "application/json",
-                },
+        if "error" in token_data:
+            raise HTTPException(
+                status_code=400,
+                detail=f"GitHub OAuth error: {token_data.get('error_description', 'Unknown error')}"
             )
 
-            user_data = user_response.json()
-
-            return {
-                "github_token": access_token,
-                "user": {
-                    "id": user_data.get("id"),
-                    "login": user_data.get("login"),
-                    "name": user_data.get("name"),
-                    "email": user_data.get("email"),
-                    "avatar_url": user_data.get("avatar_url"),
-                },
-            }
+        access_token = token_data.get("access_token")
+
+        # Get user information
+        user_response = await client.get(
+            "https://api.github.com/user",
+            headers={
+                "Authorization": f"Bearer {access_token}",
+                "Accept": "application/json",
+            },
+        )
+
+        user_data = user_response.json()
+
+        return {
+            "github_token": access_token,
+            "user": {
+                "id": user_data.get("id"),
+                "login": user_data.get("login"),
+                "name": user_data.get("name"),
+                "email": user_data.get("email"),
+                "avatar_url": user_data.get("avatar_url"),
+            },
+        }
 
 
 async def get_current_user(
@@ -0,0 +1,32 @@
+"""
+Shared runner for the @modal.batched Writer and Verifier entry points.
+
+Modal hands each entry point a list of jobs; they are processed in
+parallel threads, and a job that raises is logged and reported as None
+so it cannot fail the rest of its batch.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+
+def run_batch(fn, jobs, label, key):
+    """
+    Apply fn to every job in parallel threads.
+
+    Args:
+        fn: Function processing a single job
+        jobs: Jobs for fn
+        label: Agent name used in error logs
+        key: Job key holding the file path, for error logs
+
+    Returns:
+        One fn result per job, in order (None for a job that raised)
+    """
+    def run_one(job):
+        try:
+            return fn(job)
+        except Exception as e:
+            print(f"{label} error for {job.get(key)}: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+        return list(pool.map(run_one, jobs))
@@ -1,19 +1,67 @@
 import os
 import argparse
-from anthropic import Anthropic
+import asyncio
+import hashlib
+import uuid
+import contextvars
+from collections import defaultdict, deque
+from datetime import datetime, timezone
+from anthropic import AsyncAnthropic
 from pydantic import BaseModel, ValidationError
+from typing import Optional
 import json
-import supabase
+import prefilter
 from config import Config
+from db import get_supabase_client
+from json_extract import extract_json, response_model, tool_schema
+from llm_cache import acached_messages_create
+from status_writer import get_status_writer, job_id_for
 
 # Model configuration
-READER_MODEL = "claude-sonnet-4-20250514"
+READER_FAST = "claude-3-5-haiku-20241022"   # Haiku triages every file (fast/cheap)
+READER_DEEP = "claude-sonnet-4-20250514"    # Sonnet analyzes files Haiku flags
+READER_PROMPT_VERSION = "reader-v2"
+READER_TRIAGE_PROMPT_VERSION = "reader-triage-v1"
+READER_BATCH_PROMPT_VERSION = "reader-batch-v2"
 
-# Initialize Anthropic client (Reader Agent - Sonnet)
-client = Anthropic(api_key=Config.ANTHROPIC_API_KEY)
+# Haiku "up to date" verdicts below this confidence are escalated to Sonnet
+TRIAGE_CONFIDENCE = 0.7
+
+# Maximum number of in-flight Reader calls per run
+MAX_CONCURRENCY = 20
+
+# Maximum number of concurrent file reads per run
+MAX_IO_CONCURRENCY = 10
+
+# Files longer than this are triaged in overlapping windows. Each window
+# is also what the Writer rewrites for such a file, so it has to fit in
+# the Writer's 8192 output tokens at ~3 chars per token
+MAX_PROMPT_CHARS = 20_000
+CHUNK_OVERLAP = 500
+
+# Stored per-file verdicts, used to skip unchanged files on re-runs
+VERDICTS_TABLE = "file_verdicts"
+
+# Batching: small files are packed into a single Reader call
+BATCH_CHAR_BUDGET = 60_000
+MAX_BATCH_FILES = 8
+
+# Traversal filters
+SKIP_DIRS = frozenset({".git", "node_modules", "__pycache__", ".next", "dist", "build", ".venv"})
+SKIP_EXTENSIONS = (".css", ".json", ".md", ".svg", ".ico", ".mjs", ".gitignore", ".env")
+MAX_FILE_SIZE = 1_000_000
+
+# Initialize Anthropic client (Reader Agent - Haiku triage, Sonnet analysis)
+client = AsyncAnthropic(api_key=Config.ANTHROPIC_API_KEY)
 
 # Initialize Supabase client
-supabase_client = supabase.create_client(Config.SUPABASE_URL, Config.SUPABASE_KEY)
+supabase_client = get_supabase_client()
+
+# Progress rows are batched and written in the background
+status_writer = get_status_writer()
+
+# Pipeline run the current fetch_updates call belongs to
+current_run_id = contextvars.ContextVar("current_run_id", default=None)
 
 
 class CodeChange(BaseModel):
@@ -21,35 +69,92 @@ class CodeChange(BaseModel):
     code_content: str
     reason: str
     add: bool
+    # [start, end) character offsets the Reader flagged, for large files
+    range_of_interest: Optional[list[int]] = None
+
+# What Sonnet reports for a file; the rest of a CodeChange is filled in locally
+class Verdict(BaseModel):
+    reason: str
+    add: bool
 
-def get_all_files_recursively(root_directory):
+def iter_source_files(root_directory, skip_dirs=SKIP_DIRS, skip_exts=SKIP_EXTENSIONS):
     """
-    Recursively collect all file paths under the specified directory.
+    Lazily walk root_directory and yield (path, size) for every candidate
+    source file.
+
+    Hidden and vendored directories are pruned without being descended
+    into, and sizes come from the cached DirEntry stat so no extra stat
+    call is made per file. Files larger than MAX_FILE_SIZE are skipped.
     """
-    all_files = []
-    for root, dirs, files in os.walk(root_directory):
-        for filename in files:
-            # Build the full path to the file
-            file_path = os.path.join(root, filename)
-            all_files.append(file_path)
-    return all_files
+    stack = [root_directory]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name in skip_dirs or entry.name.startswith("."):
+                        continue
+                    stack.append(entry.path)
+                    continue
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                if entry.name.startswith(".") or entry.name.endswith(skip_exts):
+                    continue
+                size = entry.stat(follow_symlinks=False).st_size
+                if size > MAX_FILE_SIZE:
+                    continue
+                yield entry.path, size
+
+def _emit_reading(file_path, code):
+    filename = file_path.split("/")[-1]
+    status_writer.emit({
+        "job_id": job_id_for(current_run_id.get(), file_path),
+        "stage": "reader",
+        "status": "READING",
+        "message": f"📖 Reading {filename}",
+        "code": code
+    })
 
-def analyze_file_with_llm(file_path):
+def _read_and_hash(file_path):
+    """Reads a file's raw bytes and returns them with their SHA-256 hex digest."""
+    with open(file_path, 'rb') as f:
+        raw = f.read()
+    return raw, hashlib.sha256(raw).hexdigest()
+
+async def triage_file(file_content):
     """
-    Reads file content and queries the LLM to determine if it's out of date
-    and what changes might be necessary. Returns a CodeChange object if applicable.
+    Asks Haiku for a quick outdated/up-to-date verdict on a file.
+    Returns a dict with keys outdated and confidence.
     """
-    with open(file_path, 'r', encoding="utf-8", errors="ignore") as f:
-        file_content = f.read()
+    triage_prompt = (
+        "Quickly decide whether the syntax of the following code is out of date.\n\n"
+        f"```\n{file_content}\n```\n\n"
+        "Return ONLY valid JSON:\n"
+        '{"outdated": true/false, "confidence": 0.0-1.0}'
+    )
+
+    response = await acached_messages_create(
+        client,
+        supabase_client,
+        READER_TRIAGE_PROMPT_VERSION,
+        model=READER_FAST,
+        max_tokens=256,
+        messages=[{"role": "user", "content": triage_prompt}]
+    )
+    return extract_json(response.content[0].text)
 
+async def deep_analyze(file_path, file_content):
+    """
+    Queries Sonnet for a full analysis of a file Haiku could not clear.
+    Returns a CodeChange object, or None if the reply could not be used.
 
+    Sonnet only reports the verdict; path and code_content come from the
+    arguments, so the file is never echoed back.
+    """
     # Create a user prompt for the LLM
     user_prompt = (
         "Analyze the following code and determine if the syntax is out of date. "
-        "If it is out of date, specify what changes need to be made in the following JSON format:\n\n"
+        "Report your verdict in the following JSON format:\n\n"
         "{\n"
-        '  "path": "relative/file/path",\n'
-        '  "code_content": "The entire content of the file, before any changes are made. This should be a complete file, not just a partial updated code segment."\n'
         '  "reason": "A short explanation of why the code is out of date."\n'
         '  "add": "Whether the code should be updated and has changes."\n'
         "}\n\n"
@@ -58,47 +163,39 @@ def analyze_file_with_llm(file_path):
 
 
     try:
-        response = client.messages.create(
-            model=READER_MODEL,
-            max_tokens=4096,
-            messages=[
+        response = await acached_messages_create(
+            client,
+            supabase_client,
+            READER_PROMPT_VERSION,
+            model=READER_DEEP,
+            max_tokens=1024,
+            # Fixed instructions are cached server-side; only the file varies per call
+            system=[
                 {
-                    "role": "user",
-                    "content": "You are a helpful assistant that analyzes code and returns a JSON object with the path, and raw code content. Your goal is to identify outdated syntax in code and keep track of it. Return ONLY valid JSON with keys: path, code_content, reason, add.\n\n" + user_prompt
+                    "type": "text",
+                    "text": "You are a helpful assistant that analyzes code and returns a JSON verdict on it. Your goal is to identify outdated syntax in code and keep track of it. Return ONLY valid JSON with keys: reason, add.",
+                    "cache_control": {"type": "ephemeral"}
                 }
-            ]
+            ],
+            messages=[{"role": "user", "content": user_prompt}],
+            # Force a structured reply so there are no code fences to strip
+            tools=[tool_schema("emit_verdict", "Report the analysis of the file.", Verdict)],
+            tool_choice={"type": "tool", "name": "emit_verdict"}
         )
 
-        # Parse response JSON into CodeChange
-        response_text = response.content[0].text.strip()
-        if "```json" in response_text:
-            response_text = response_text.split("```json")[1].split("```")[0].strip()
-        elif "```" in response_text:
-            response_text = response_text.split("```")[1].split("```")[0].strip()
-        parsed = json.loads(response_text)
-        chat_completion = CodeChange(**parsed)
+        # Parse response JSON into a Verdict and attach the file locally
+        verdict = response_model(response, Verdict)
+        chat_completion = CodeChange(
+            path=file_path,
+            code_content=file_content,
+            reason=verdict.reason,
+            add=verdict.add,
+        )
 
-        print(chat_completion)
+        print(chat_completion.path, chat_completion.add, chat_completion.reason)
 
-        filename = file_path.split("/")[-1]
-        data = {
-            "status": "READING",
-            "message": f"📖 Reading {filename}",
-            "code": chat_completion.code_content
-        }
+        _emit_reading(file_path, file_content)
 
-        try:
-            supabase_client.table("repo-updates").insert(data).execute()
-        except Exception as db_error:
-            # If filename column doesn't exist, try without it
-            print(f"Database error (may need to add 'filename' column): {db_error}")
-            data_fallback = {
-                "status": "READING",
-                "message": f"📖 Reading {filename}",
-                "code": chat_completion.code_content
-            }
-            supabase_client.table("repo-updates").insert(data_fallback).execute()
-        
         return chat_completion
     except (ValidationError, json.JSONDecodeError) as parse_error:
         print(f"Error parsing LLM response for {file_path}: {parse_error}")
@@ -107,37 +204,431 @@ def analyze_file_with_llm(file_path):
         # Handle any other exceptions, e.g. network errors, model issues, etc.
         print(f"Error analyzing {file_path}: {e}")
         return None
-    
-def fetch_updates(directory):
+
+def iter_chunks(content, max_chars=MAX_PROMPT_CHARS, overlap=CHUNK_OVERLAP):
     """
-    Fetches the latest updates for a given file from the repository.
+    Splits content into overlapping windows of at most max_chars.
+    Yields (start, end, text) tuples.
     """
-    analysis_results = []
-    all_files = get_all_files_recursively(directory)
-    for filepath in all_files:
-        
-        if (
-            os.path.basename(filepath).startswith(".") or
-            filepath.endswith((".css", ".json", ".md", ".svg", ".ico", ".mjs", ".gitignore", ".env"))
-            or ".git/" in filepath
-        ):
+    start = 0
+    while True:
+        end = min(start + max_chars, len(content))
+        yield start, end, content[start:end]
+        if end == len(content):
+            return
+        start = end - overlap
+
+async def analyze_large_file(file_path, file_content):
+    """
+    Triages a file too large for a single prompt one window at a time.
+
+    Windows Haiku flags with confidence are reported straight away;
+    windows it cannot call either way go to Sonnet. The first flagged
+    window makes the whole file outdated, with that window as the range
+    of interest; the Writer then rewrites just that window and splices it back.
+    Returns None if a window could not be analyzed.
+    """
+    for start, end, window in iter_chunks(file_content):
+        try:
+            verdict = await triage_file(window)
+        except Exception as e:
+            print(f"Triage error for {file_path} [{start}:{end}]: {e}")
+            return None
+
+        confident = verdict.get("confidence", 0) > TRIAGE_CONFIDENCE
+        if confident and not verdict.get("outdated", True):
             continue
+
+        reason = f"Outdated syntax found in characters {start}-{end}"
+        if not confident:
+            change = await deep_analyze(file_path, window)
+            if change is None:
+                return None
+            if not change.add:
+                continue
+            reason = f"{change.reason} (characters {start}-{end})"
+
+        _emit_reading(file_path, file_content)
+        return CodeChange(
+            path=file_path,
+            code_content=file_content,
+            reason=reason,
+            add=True,
+            range_of_interest=[start, end],
+        )
+
+    _emit_reading(file_path, file_content)
+    return CodeChange(
+        path=file_path,
+        code_content=file_content,
+        reason="Up to date (Haiku triage)",
+        add=False,
+    )
+
+async def analyze_file_with_llm(file_path, file_content):
+    """
+    Queries the LLM with a file's content to determine if it's out of date
+    and what changes might be necessary. Returns a CodeChange object if applicable.
+
+    Haiku triages the file first; Sonnet is only called when Haiku flags
+    the file as outdated or is not confident it is up to date. Files over
+    MAX_PROMPT_CHARS are triaged window by window instead.
+    """
+
+    if len(file_content) > MAX_PROMPT_CHARS:
+        return await analyze_large_file(file_path, file_content)
+
+    try:
+        verdict = await triage_file(file_content)
+    except Exception as e:
+        print(f"Triage error for {file_path}, escalating to Sonnet: {e}")
+        verdict = {"outdated": True, "confidence": 0.0}
+
+    if not verdict.get("outdated", True) and verdict.get("confidence", 0) > TRIAGE_CONFIDENCE:
+        _emit_reading(file_path, file_content)
+        return CodeChange(
+            path=file_path,
+            code_content=file_content,
+            reason="Up to date (Haiku triage)",
+            add=False,
+        )
+
+    return await deep_analyze(file_path, file_content)
+
+async def analyze_files_batch(paths, contents):
+    """
+    Triages several small files with a single Haiku call.
+
+    The model only reports a verdict per file; path and code_content are
+    filled in locally so the original source is never echoed back. Files
+    Haiku flags as outdated, cannot confidently clear, or leaves out of its
+    reply (all of them, if the batch call fails) are escalated to Sonnet
+    individually. Returns a list of
+    CodeChange objects, one per file that got a verdict.
+    """
+
+    files_prompt = "".join(
+        f"FILE {index} (path={file_path}):\n```\n{content}\n```\n\n"
+        for index, (file_path, content) in enumerate(zip(paths, contents))
+    )
+    user_prompt = (
+        "Analyze each of the following files and determine if its syntax is out of date. "
+        "Return a JSON array with one object per file below, in the following format:\n\n"
+        "[\n"
+        "  {\n"
+        '    "index": "The FILE number given below.",\n'
+        '    "reason": "A short explanation of why the code is out of date.",\n'
+        '    "add": "Whether the code should be updated and has changes.",\n'
+        '    "confidence": "Your confidence in this verdict, from 0.0 to 1.0."\n'
+        "  }\n"
+        "]\n\n"
+        f"{files_prompt}"
+    )
+
+    try:
+        response = await acached_messages_create(
+            client,
+            supabase_client,
+            READER_BATCH_PROMPT_VERSION,
+            model=READER_FAST,
+            max_tokens=4096,
+            system=[
+                {
+                    "type": "text",
+                    "text": "You are a helpful assistant that analyzes code files and returns a JSON array with one verdict per file. Your goal is to identify outdated syntax in code and keep track of it. Return ONLY a valid JSON array of objects with keys: index, reason, add, confidence.",
+                    "cache_control": {"type": "ephemeral"}
+                }
+            ],
+            messages=[{"role": "user", "content": user_prompt}]
+        )
+
+        parsed = extract_json(response.content[0].text)
+    except json.JSONDecodeError as parse_error:
+        # No verdicts at all; every file is escalated below
+        print(f"Error parsing batch LLM response for {len(paths)} files: {parse_error}")
+        parsed = []
+    except Exception as e:
+        print(f"Error analyzing batch of {len(paths)} files: {e}")
+        parsed = []
+    if not isinstance(parsed, list):
+        print(f"Batch LLM response for {len(paths)} files is not a list")
+        parsed = []
+
+    changes = []
+    escalate = []
+    # Indices the model reported on; files it left out have no verdict yet
+    seen = set()
+    for item in parsed:
+        try:
+            index = int(item["index"])
+            if index < 0 or index in seen:
+                raise IndexError(index)
+            change = CodeChange(
+                path=paths[index],
+                code_content=contents[index],
+                reason=item.get("reason", ""),
+                add=item.get("add", False),
+            )
+            confidence = float(item.get("confidence", 0))
+        except (KeyError, IndexError, TypeError, ValueError, ValidationError) as item_error:
+            print(f"Skipping malformed batch item {item}: {item_error}")
+            continue
+
+        seen.add(index)
+        if change.add or confidence <= TRIAGE_CONFIDENCE:
+            escalate.append(index)
+            continue
+        _emit_reading(change.path, change.code_content)
+        changes.append(change)
+
+    escalate.extend(index for index in range(len(paths)) if index not in seen)
+
+    deep_results = await asyncio.gather(
+        *(deep_analyze(paths[index], contents[index]) for index in escalate)
+    )
+    for index, change in zip(escalate, deep_results):
+        if change is not None:
+            change.path = paths[index]
+            changes.append(change)
+
+    return changes
+
+async def pack_batches(files, budget=BATCH_CHAR_BUDGET, max_files=MAX_BATCH_FILES):
+    """
+    Greedily packs an async iterable of (path, size) pairs into batches whose
+    total size stays under budget, yielding each batch as soon as it is
+    full. Files larger than the budget, or too large for one prompt, are
+    yielded on their own.
+    """
+    current = []
+    current_size = 0
+    async for file_path, size in files:
+        if size >= budget or size > MAX_PROMPT_CHARS:
+            yield [file_path]
+            continue
+        if current and (current_size + size >= budget or len(current) >= max_files):
+            yield current
+            current = []
+            current_size = 0
+        current.append(file_path)
+        current_size += size
+    if current:
+        yield current
+
+def load_verdicts(repo_url):
+    """
+    Fetches the stored Reader verdicts for a repository.
+    Returns a dict mapping relative path to its file_verdicts row.
+    """
+    try:
+        result = supabase_client.table(VERDICTS_TABLE) \
+            .select("path, content_sha256, add, reason, range_of_interest") \
+            .eq("repo_url", repo_url) \
+            .execute()
+    except Exception as e:
+        print(f"Error loading stored verdicts for {repo_url}: {e}")
+        return {}
+    return {row["path"]: row for row in result.data}
+
+def save_verdicts(repo_url, rows):
+    """Upserts Reader verdicts so the next run can skip unchanged files."""
+    if not rows:
+        return
+    updated_at = datetime.now(timezone.utc).isoformat()
+    try:
+        supabase_client.table(VERDICTS_TABLE) \
+            .upsert(
+                [{"repo_url": repo_url, "updated_at": updated_at, **row} for row in rows],
+                on_conflict="repo_url,path"
+            ) \
+            .execute()
+    except Exception as e:
+        print(f"Error saving verdicts for {repo_url}: {e}")
+
+async def iter_candidate_files(directory, duplicates, digests, known, reused, sources, io_sem):
+    """
+    Yields (path, size) for files under directory that pass the local
+    pre-filter and are worth a Reader call. Each file is read once, off
+    the event loop, with at most io_sem reads in flight; the text of every
+    yielded file is left in sources so the Reader does not read it again.
+
+    Byte-identical files are only yielded once; every later copy is
+    recorded in duplicates under the path of the first one. Every file's
+    SHA-256 is recorded in digests. Files whose hash matches a verdict in
+    known (keyed by path relative to directory) are not yielded: outdated
+    ones are rebuilt from the stored verdict into reused, up-to-date ones
+    are dropped.
+    """
+    async def read(file_path):
+        async with io_sem:
+            return await asyncio.to_thread(_read_and_hash, file_path)
+
+    async def read_ahead():
+        # Reads start ahead of the checks below but finish in walk order;
+        # the window keeps memory bounded on large repositories
+        pending = deque()
+        try:
+            for file_path, size in iter_source_files(directory):
+                pending.append((file_path, size, asyncio.create_task(read(file_path))))
+                if len(pending) >= 2 * MAX_IO_CONCURRENCY:
+                    file_path, size, task = pending.popleft()
+                    yield file_path, size, *(await task)
+            while pending:
+                file_path, size, task = pending.popleft()
+                yield file_path, size, *(await task)
+        finally:
+            for _, _, task in pending:
+                task.cancel()
+
+    seen = {}
+    async for file_path, size, raw, digest in read_ahead():
+        digests[file_path] = digest
+
+        prior = known.get(os.path.relpath(file_path, directory))
+        if prior is not None and prior["content_sha256"] == digest:
+            if prior["add"]:
+                reused.append(CodeChange(
+                    path=file_path,
+                    code_content=raw.decode("utf-8", errors="ignore"),
+                    reason=prior["reason"],
+                    add=True,
+                    range_of_interest=prior.get("range_of_interest"),
+                ))
+            continue
+
+        representative = seen.setdefault(digest, file_path)
+        if representative != file_path:
+            duplicates[representative].append(file_path)
+            continue
+        content = raw.decode("utf-8", errors="ignore")
+        if prefilter.should_analyze(file_path, content):
+            sources[file_path] = content
+            yield file_path, size
+
+async def stream_updates(directory, run_id=None, repo_url=None):
+    """
+    Analyzes the files of a repository and yields each CodeChange that
+    needs an update as soon as the batch containing it has been analyzed.
+
+    run_id identifies the pipeline run in progress rows; a fresh one is
+    generated when not given. When repo_url is given, files whose content
+    is unchanged since the last run reuse the stored verdict instead of
+    calling the LLM, and new verdicts are saved once every file is done.
+
+    Files are analyzed concurrently, with at most MAX_CONCURRENCY Reader
+    calls in flight at once. Batches are dispatched as traversal produces
+    them, so analysis starts before the walk has finished. Identical files
+    are analyzed once and the result is fanned out to every copy.
+    """
+    # Tasks created below inherit this context
+    current_run_id.set(run_id or str(uuid.uuid4()))
+    prefilter.reset_stats()
+
+    sem = asyncio.Semaphore(MAX_CONCURRENCY)
+    io_sem = asyncio.Semaphore(MAX_IO_CONCURRENCY)
+    # Finished batch results (or exceptions), closed with None
+    results = asyncio.Queue()
+
+    async def _analyze(filepath, sem):
         # Query LLM for this file
+        async with sem:
+            response = await analyze_file_with_llm(filepath, sources.pop(filepath))
+        if response is not None:
+            response.path = filepath
+            return [response]
+        return []
 
-        response = analyze_file_with_llm(filepath)
-        if response is None or response.add == False:
-            continue  # Skip if there was an error
-        print(filepath)
-        response.path = filepath
-        analysis_results.append(response)
+    async def _analyze_batch(paths, sem):
+        # Oversized files and lone leftovers go through the single-file prompt
+        try:
+            if len(paths) == 1:
+                response = await _analyze(paths[0], sem)
+            else:
+                async with sem:
+                    contents = [sources.pop(path) for path in paths]
+                    response = await analyze_files_batch(paths, contents)
+        except Exception as e:
+            response = e
+        await results.put(response)
 
-    return analysis_results
-    
+    # Representative path -> paths of byte-identical copies
+    duplicates = defaultdict(list)
+    # Path -> SHA-256 of its content
+    digests = {}
+    # Outdated files rebuilt from stored verdicts
+    reused = []
+    # Path -> text of a candidate file, until its batch is analyzed
+    sources = {}
+    known = await asyncio.to_thread(load_verdicts, repo_url) if repo_url else {}
+
+    async def _dispatch():
+        tasks = []
+        candidates = iter_candidate_files(directory, duplicates, digests, known, reused, sources, io_sem)
+        try:
+            async for batch in pack_batches(candidates):
+                tasks.append(asyncio.create_task(_analyze_batch(batch, sem)))
+                # Let the new task issue its request before walking further
+                await asyncio.sleep(0)
+            await asyncio.gather(*tasks)
+        finally:
+            await results.put(None)
+
+    dispatcher = asyncio.create_task(_dispatch())
+
+    verdicts = []
+    while (response := await results.get()) is not None:
+        if isinstance(response, Exception):
+            print(f"Error analyzing files: {response}")
+            continue
+        for change in response:
+            # Identical files share the verdict of the copy that was analyzed
+            copies = [change] + [
+                change.model_copy(update={"path": duplicate_path})
+                for duplicate_path in duplicates.get(change.path, ())
+            ]
+            for verdict in copies:
+                verdicts.append({
+                    "path": os.path.relpath(verdict.path, directory),
+                    "content_sha256": digests[verdict.path],
+                    "add": verdict.add,
+                    "reason": verdict.reason,
+                    "range_of_interest": verdict.range_of_interest,
+                })
+            if change.add == False:
+                continue
+            print(change.path)
+            for copy in copies:
+                yield copy
+
+    # Surfaces traversal errors
+    await dispatcher
+    print(
+        f"Pre-filter skipped {prefilter.stats['skipped']}/{prefilter.stats['checked']} files "
+        f"({prefilter.hit_rate():.0%}) without an LLM call"
+    )
+
+    if reused:
+        print(f"Reused {len(reused)} stored verdicts for unchanged outdated files")
+        for change in reused:
+            yield change
+
+    if repo_url:
+        await asyncio.to_thread(save_verdicts, repo_url, verdicts)
+
+async def fetch_updates(directory, run_id=None, repo_url=None):
+    """
+    Fetches the latest updates for a given file from the repository.
+
+    Collects everything stream_updates yields into a list; see there for
+    the arguments.
+    """
+    return [change async for change in stream_updates(directory, run_id, repo_url)]
 
 
 def main():
     # print(fetch_updates("website-test")[0])
-    print(fetch_updates("website-test"))
+    print(asyncio.run(fetch_updates("website-test")))
+    status_writer.flush()
 
     # parser = argparse.ArgumentParser(description="Analyze code files for outdated syntax.")
     # parser.add_argument("directory", type=str, help="Directory to analyze")
@@ -3,6 +3,7 @@ Configuration management for Dependify backend.
 Loads environment variables and provides centralized access.
 """
 import os
+import functools
 from dotenv import load_dotenv
 from typing import Optional
 
@@ -34,14 +35,20 @@ class Config:
     # API Security
     API_SECRET_KEY: str = os.getenv("API_SECRET_KEY", "")
 
+    # Parent directory for per-request staging clones (system temp dir if unset)
+    STAGING_ROOT: Optional[str] = os.getenv("STAGING_ROOT") or None
+
     # Rate Limiting
     RATE_LIMIT_PER_MINUTE: int = int(os.getenv("RATE_LIMIT_PER_MINUTE", "10"))
     RATE_LIMIT_PER_HOUR: int = int(os.getenv("RATE_LIMIT_PER_HOUR", "100"))
+    # Key rate limits on X-Forwarded-For / X-Real-IP; only enable behind a proxy that sets them
+    TRUST_PROXY_HEADERS: bool = os.getenv("TRUST_PROXY_HEADERS", "false").lower() == "true"
 
     # CORS allowed origins
     @staticmethod
+    @functools.lru_cache(maxsize=1)
     def get_allowed_origins() -> list:
-        """Get CORS allowed origins."""
+        """Get CORS allowed origins. Computed once; FRONTEND_URL is fixed at import."""
         frontend_url = Config.FRONTEND_URL
         origins = [frontend_url]
 
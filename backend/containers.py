@@ -1,75 +1,122 @@
 import os
 import modal
+import shutil
+import asyncio
 import subprocess
-from checker import fetch_updates
-from checker import CodeChange
+from typing import AsyncIterator
+from checker import stream_updates
+from checker import status_writer
 
-# Create Modal image with all necessary dependencies
+# Create Modal image with only what run_script needs at runtime
 image = modal.Image.debian_slim(python_version="3.10") \
-    .apt_install("git", "python3", "bash") \
+    .apt_install("git") \
     .pip_install(
-        "python-dotenv",
+        "python-dotenv",  # config.py loads .env when present
         "anthropic",
-        "fastapi",
-        "uvicorn",
-        "modal",
+        "aiofiles",
+        "aiolimiter",
+        "tenacity",
+        "orjson",
         "pydantic",
-        "websockets",
         "supabase"
     ) \
-    .add_local_python_source("checker") \
-    .add_local_python_source("config") \
-    .add_local_python_source("auth") \
-    .add_local_python_source("server")
+    .add_local_python_source(
+        "checker",
+        "config",
+        "db",
+        "json_extract",
+        "llm_cache",
+        "prefilter",
+        "rate_limit",
+        "status_writer"
+    )
 
 app = modal.App(name="claude-read", image=image)
 
+# pot-tools checkout persisted across invocations, refreshed with a shallow fetch
+tools_vol = modal.Volume.from_name("pot-tools", create_if_missing=True)
+TOOLS_DIR = "/tools"
+TOOLS_REPO_URL = "https://github.com/kshitizz36/pot-tools.git"
+
+# Original sources of the files yielded below, keyed "<run_id>:<path>", so
+# the Verifier can read them instead of receiving them with every job
+originals = modal.Dict.from_name("dependify-originals", create_if_missing=True)
+
+# Target repository checkout. server.py maps returned paths relative to
+# this directory into its staging clone.
+REPOSITORY_DIR = "/root/scripts/repository"
+
 
 @app.function(
     timeout=600,  # 10 minutes for large repos
     max_containers=50,  # Allow up to 50 parallel analysis workers
     min_containers=2,  # Keep 2 containers warm to avoid cold starts
+    volumes={TOOLS_DIR: tools_vol},
     secrets=[
         modal.Secret.from_name("ANTHROPIC_API_KEY"),
         modal.Secret.from_name("SUPABASE_URL"),
         modal.Secret.from_name("SUPABASE_KEY")
     ]
 )
-def run_script(repo_url: str) -> list[CodeChange]:
+async def run_script(repo_url: str, run_id: str = None) -> AsyncIterator[dict]:
     """
     Clones the given repository, analyzes files for outdated syntax,
-    and returns a list of CodeChange objects.
+    and streams back a CodeChange for each file that needs an update.
+
+    Call with run_script.remote_gen so the Writer can start on the first
+    files while the rest of the repository is still being read.
 
     Args:
         repo_url: GitHub repository URL to analyze
+        run_id: Pipeline run id used to key progress rows
 
-    Returns:
-        List of CodeChange objects representing files that need updates
+    Yields:
+        Serialized CodeChange objects, one per file that needs updates
     """
-    import os
-
-    subprocess.run(
-        ["git", "clone", "https://github.com/kshitizz36/pot-tools.git", "scripts"],
-        check=True,
-        capture_output=True,
-        text=True
-    ).stdout
+    if not os.path.exists(os.path.join(TOOLS_DIR, ".git")):
+        subprocess.run(
+            ["git", "clone", "--depth=1", TOOLS_REPO_URL, TOOLS_DIR],
+            check=True,
+            capture_output=True,
+            text=True
+        )
+        tools_vol.commit()
+    else:
+        # Refreshing is best-effort: the cached checkout is good enough to run on
+        try:
+            fetch = subprocess.run(
+                ["git", "-C", TOOLS_DIR, "fetch", "--depth=1", "origin"],
+                capture_output=True,
+                text=True
+            )
+            if fetch.returncode == 0:
+                reset = subprocess.run(
+                    ["git", "-C", TOOLS_DIR, "reset", "--hard", "FETCH_HEAD"],
+                    capture_output=True,
+                    text=True
+                )
+                if reset.returncode == 0:
+                    tools_vol.commit()
+                else:
+                    print(f"Could not update tools checkout: {reset.stderr.strip()}")
+            else:
+                print(f"Could not fetch tools updates: {fetch.stderr.strip()}")
+        except Exception as e:
+            print(f"Could not refresh tools checkout: {e}")
 
-    os.chdir("scripts")
-    subprocess.run(
-        ["git", "clone", repo_url, "repository"],
-        check=True,
-        capture_output=True,
-        text=True
-    ).stdout
+    # Warm containers may still hold the previous run's checkout
+    shutil.rmtree(REPOSITORY_DIR, ignore_errors=True)
+    os.makedirs(os.path.dirname(REPOSITORY_DIR), exist_ok=True)
 
+    # Only the current tree is analyzed, so skip history and defer blobs
     subprocess.run(
-        ["ls", "repository"],
+        ["git", "clone", "--depth=1", "--filter=blob:none", "--single-branch", repo_url, REPOSITORY_DIR],
         check=True,
         capture_output=True,
         text=True
-    ).stdout
-
-    data = fetch_updates(os.getcwd() + "/repository")
+    )
 
-    return [change.model_dump(mode="json") for change in data]  # Ensure CodeChange is serializable
+    async for change in stream_updates(REPOSITORY_DIR, run_id, repo_url):
+        await originals.put.aio(f"{run_id}:{change.path}", change.code_content)
+        yield change.model_dump(mode="json")  # Ensure CodeChange is serializable
+    await asyncio.to_thread(status_writer.flush)
@@ -0,0 +1,44 @@
+"""
+Shared Supabase client for Dependify backend.
+
+Every module goes through get_supabase_client() so a process (or warm
+Modal container) holds exactly one client and one pooled HTTP connection
+set, instead of paying a fresh TLS handshake per insert.
+"""
+import functools
+import os
+
+import httpx
+import supabase
+from supabase import ClientOptions
+
+# HTTP connection pool shared by all PostgREST calls
+MAX_KEEPALIVE_CONNECTIONS = 20
+MAX_CONNECTIONS = 40
+REQUEST_TIMEOUT = 10.0
+
+
+@functools.lru_cache(maxsize=1)
+def get_supabase_client():
+    """
+    Create the process-wide Supabase client on first use.
+
+    Credentials are read from the environment at call time, so this works
+    both on the API server (populated from .env) and inside Modal containers
+    (populated from Modal secrets).
+    """
+    http_client = httpx.Client(
+        limits=httpx.Limits(
+            max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+            max_connections=MAX_CONNECTIONS,
+        ),
+        timeout=REQUEST_TIMEOUT,
+    )
+    return supabase.create_client(
+        os.getenv("SUPABASE_URL", ""),
+        os.getenv("SUPABASE_KEY", ""),
+        options=ClientOptions(
+            postgrest_client_timeout=REQUEST_TIMEOUT,
+            httpx_client=http_client,
+        ),
+    )
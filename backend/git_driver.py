@@ -1,14 +1,61 @@
 from git import Repo
 import uuid
-import requests
+import httpx
+import asyncio
 import os
-import supabase
 from config import Config
+from db import get_supabase_client
 
 # Initialize Supabase client
-supabase_client = supabase.create_client(Config.SUPABASE_URL, Config.SUPABASE_KEY)
+supabase_client = get_supabase_client()
 
-def create_fork(repo_owner, repo_name):
+
+def create_github_client():
+    """
+    Create the shared GitHub API client. Every function below that talks to
+    GitHub takes it as `client`, so TLS connections are reused across calls.
+    """
+    return httpx.AsyncClient(
+        base_url="https://api.github.com",
+        http2=True,
+        timeout=30,
+        limits=httpx.Limits(max_connections=100),
+        headers={"Accept": "application/vnd.github+json"},
+    )
+
+
+def _auth_headers():
+    return {"Authorization": f"token {Config.GITHUB_TOKEN}"}
+
+# API path -> (ETag, JSON body) of the last 200 response, for conditional GETs
+_etag_cache = {}
+
+async def _conditional_get(client, path, headers):
+    """
+    GET a GitHub API path with If-None-Match when a previous response was
+    cached. A 304 answer is served from the cache, which GitHub does not
+    count against the rate limit.
+
+    Returns:
+        Tuple of (status_code, JSON body or None); a 304 is reported as 200
+    """
+    cached = _etag_cache.get(path)
+    if cached is not None:
+        headers = {**headers, "If-None-Match": cached[0]}
+
+    response = await client.get(path, headers=headers)
+    if response.status_code == 304 and cached is not None:
+        return 200, dict(cached[1])
+    if response.status_code != 200:
+        return response.status_code, None
+
+    data = response.json()
+    etag = response.headers.get("ETag")
+    if etag:
+        _etag_cache[path] = (etag, data)
+    return 200, dict(data)
+
+async def create_fork(client, repo_owner, repo_name):
     """
     Create a TEMPORARY STAGING fork of the repository for PR creation purposes.
     
@@ -19,6 +66,7 @@ def create_fork(repo_owner, repo_name):
     If fork already exists, returns the existing fork information.
 
     Args:
+        client: Shared GitHub API client (see create_github_client)
         repo_owner: Original repository owner
         repo_name: Repository name
 
@@ -28,46 +76,37 @@ def create_fork(repo_owner, repo_name):
     if not Config.GITHUB_TOKEN:
         raise ValueError("GITHUB_TOKEN not configured")
 
-    headers = {
-        "Authorization": f"token {Config.GITHUB_TOKEN}",
-        "Accept": "application/vnd.github.v3+json"
-    }
+    headers = _auth_headers()
     
     # Get authenticated user's username
     try:
-        user_response = requests.get("https://api.github.com/user", headers=headers, timeout=30)
-        if user_response.status_code == 200:
-            username = user_response.json()["login"]
+        user_status, user_data = await _conditional_get(client, "/user", headers)
+        if user_status == 200:
+            username = user_data["login"]
             
             # Check if user owns the repository
             if username.lower() == repo_owner.lower():
                 print(f"User owns the repository - no fork needed")
                 # Get original repo info
-                repo_url = f"https://api.github.com/repos/{repo_owner}/{repo_name}"
-                repo_response = requests.get(repo_url, headers=headers, timeout=30)
-                if repo_response.status_code == 200:
-                    repo_data = repo_response.json()
+                repo_status, repo_data = await _conditional_get(client, f"/repos/{repo_owner}/{repo_name}", headers)
+                if repo_status == 200:
                     repo_data['is_own_repo'] = True  # Flag to indicate it's user's own repo
                     return repo_data
             
             # Check if fork already exists
-            fork_check_url = f"https://api.github.com/repos/{username}/{repo_name}"
-            fork_response = requests.get(fork_check_url, headers=headers, timeout=30)
+            fork_status, fork_data = await _conditional_get(client, f"/repos/{username}/{repo_name}", headers)
             
-            if fork_response.status_code == 200:
-                fork_data = fork_response.json()
+            if fork_status == 200:
                 if fork_data.get("fork"):
                     print(f"Fork already exists: {fork_data['clone_url']}")
                     fork_data['is_own_repo'] = False
                     return fork_data
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         print(f"Error checking user/fork: {e}")
     
     # Create new fork
-    url = f"https://api.github.com/repos/{repo_owner}/{repo_name}/forks"
-
     try:
-        response = requests.post(url, headers=headers, timeout=30)
+        response = await client.post(f"/repos/{repo_owner}/{repo_name}/forks", headers=headers)
         if response.status_code == 202:  # GitHub returns 202 for fork creation
             print("New fork created successfully")
             fork_data = response.json()
@@ -81,7 +120,7 @@ def create_fork(repo_owner, repo_name):
         else:
             print(f"Failed to create fork: {response.status_code} - {response.text}")
             return None
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         print(f"Error creating fork: {e}")
         return None
 
@@ -111,11 +150,14 @@ def load_repository(repo_path="./staging"):
         print(f"Error loading repository: {e}")
         raise
 
-def create_and_push_branch(repo, origin, files_to_stage):
+async def create_and_push_branch(client, repo, origin, files_to_stage):
     """
     Create a new branch, stage files, commit, and push to remote.
 
+    The git work runs in a worker thread so the event loop stays free.
+
     Args:
+        client: Shared GitHub API client (see create_github_client)
         repo: Git repository object
         origin: Remote origin
         files_to_stage: List of file paths to stage
@@ -126,6 +168,21 @@ def create_and_push_branch(repo, origin, files_to_stage):
     if not Config.GITHUB_TOKEN:
         raise ValueError("GITHUB_TOKEN not configured")
 
+    # Get authenticated user's username
+    try:
+        user_response = await client.get("/user", headers=_auth_headers())
+        if user_response.status_code == 200:
+            username = user_response.json()["login"]
+        else:
+            raise Exception(f"Could not get authenticated user: {user_response.text}")
+    except httpx.HTTPError as e:
+        raise Exception(f"GitHub API error: {e}")
+
+    new_branch_name = await asyncio.to_thread(_commit_and_push, repo, origin, files_to_stage)
+    return new_branch_name, username
+
+def _commit_and_push(repo, origin, files_to_stage):
+    """Commit files_to_stage on a new branch and push it. Returns the branch name."""
     # Create unique branch name
     new_branch_name = f"dependify-{uuid.uuid4().hex[:8]}"
     new_branch = repo.create_head(new_branch_name)
@@ -154,21 +211,6 @@ Generated with Dependify 2.0
     }
     supabase_client.table("repo-updates").insert(data).execute()
 
-    # Get authenticated user's username
-    headers = {
-        "Authorization": f"token {Config.GITHUB_TOKEN}",
-        "Accept": "application/vnd.github.v3+json"
-    }
-
-    try:
-        user_response = requests.get("https://api.github.com/user", headers=headers, timeout=30)
-        if user_response.status_code == 200:
-            username = user_response.json()["login"]
-        else:
-            raise Exception(f"Could not get authenticated user: {user_response.text}")
-    except requests.RequestException as e:
-        raise Exception(f"GitHub API error: {e}")
-
     # Push to remote
     try:
         origin.push(new_branch)
@@ -177,13 +219,14 @@ Generated with Dependify 2.0
         print(f"Error pushing to remote: {e}")
         raise
 
-    return new_branch_name, username
+    return new_branch_name
 
-def create_pull_request(new_branch_name, repo_owner, repo_name, base_branch, head_owner, is_own_repo=False):
+async def create_pull_request(client, new_branch_name, repo_owner, repo_name, base_branch, head_owner, is_own_repo=False):
     """
     Create a pull request from fork to original repository, or within the same repo if user owns it.
 
     Args:
+        client: Shared GitHub API client (see create_github_client)
         new_branch_name: Name of the branch with changes
         repo_owner: Original repository owner
         repo_name: Repository name
@@ -251,11 +294,6 @@ Generated with ❤️ by [Dependify 2.0](https://github.com/kshitizz36/Dependify
 *Note: This is an automated tool for code modernization. The temporary fork used to create this PR can be deleted after the PR is merged or closed.*
 """
 
-    headers = {
-        "Authorization": f"token {Config.GITHUB_TOKEN}",
-        "Accept": "application/vnd.github.v3+json"
-    }
-
     # If it's user's own repo, head is just the branch name
     # If it's a fork, head is "username:branch_name"
     if is_own_repo:
@@ -272,10 +310,8 @@ Generated with ❤️ by [Dependify 2.0](https://github.com/kshitizz36/Dependify
         "body": pr_body
     }
 
-    url = f"https://api.github.com/repos/{repo_owner}/{repo_name}/pulls"
-
     try:
-        response = requests.post(url, json=data, headers=headers, timeout=30)
+        response = await client.post(f"/repos/{repo_owner}/{repo_name}/pulls", json=data, headers=_auth_headers())
 
         if response.status_code == 201:
             pr_url = response.json().get("html_url")
@@ -285,12 +321,12 @@ Generated with ❤️ by [Dependify 2.0](https://github.com/kshitizz36/Dependify
             error_msg = response.json().get("message", "Unknown error")
             print(f"❌ Failed to create pull request: {response.status_code} - {error_msg}")
             return None
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         print(f"❌ Error creating pull request: {e}")
         return None
 
 
-def delete_fork(repo_owner, repo_name):
+async def delete_fork(client, repo_owner, repo_name):
     """
     Delete a forked repository (OPTIONAL - for cleanup after PR is merged).
     
@@ -298,6 +334,7 @@ def delete_fork(repo_owner, repo_name):
     Users can also manually delete forks from GitHub UI.
     
     Args:
+        client: Shared GitHub API client (see create_github_client)
         repo_owner: Fork owner (usually the authenticated user)
         repo_name: Repository name
         
@@ -307,15 +344,8 @@ def delete_fork(repo_owner, repo_name):
     if not Config.GITHUB_TOKEN:
         raise ValueError("GITHUB_TOKEN not configured")
     
-    headers = {
-        "Authorization": f"token {Config.GITHUB_TOKEN}",
-        "Accept": "application/vnd.github.v3+json"
-    }
-    
-    url = f"https://api.github.com/repos/{repo_owner}/{repo_name}"
-    
     try:
-        response = requests.delete(url, headers=headers, timeout=30)
+        response = await client.delete(f"/repos/{repo_owner}/{repo_name}", headers=_auth_headers())
         
         if response.status_code == 204:  # GitHub returns 204 for successful deletion
             print(f"✅ Fork deleted: {repo_owner}/{repo_name}")
@@ -323,19 +353,19 @@ def delete_fork(repo_owner, repo_name):
         else:
             print(f"Failed to delete fork: {response.status_code} - {response.text}")
             return False
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         print(f"Error deleting fork: {e}")
         return False
 
 
 # Example usage:
-def process_repository(repo_owner, repo_name, files_to_update):
+async def process_repository(client, repo_owner, repo_name, files_to_update):
     """
     Main function to process a repository and create a PR
     """
     try:
         # 1. Create a fork first
-        fork_result = create_fork(repo_owner, repo_name)
+        fork_result = await create_fork(client, repo_owner, repo_name)
         if not fork_result:
             raise Exception("Failed to create fork")
         
@@ -354,10 +384,11 @@ def process_repository(repo_owner, repo_name, files_to_update):
         origin = repo.remotes.origin
         
         # 3. Create and push branch with changes
-        new_branch_name, username = create_and_push_branch(repo, origin, files_to_update)
+        new_branch_name, username = await create_and_push_branch(client, repo, origin, files_to_update)
         
         # 4. Create PR from fork to original repository
-        pr_url = create_pull_request(
+        pr_url = await create_pull_request(
+            client,
             new_branch_name,
             repo_owner,
             repo_name,
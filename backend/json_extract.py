@@ -0,0 +1,93 @@
+"""
+Tolerant JSON extraction for Anthropic responses.
+
+Shared by the Reader, Writer and Verifier so that a missing code fence,
+trailing commentary or several code blocks in a reply no longer turn
+into a parse failure and a wasted retry.
+"""
+import json
+import re
+
+import orjson
+from pydantic import ValidationError
+
+_FENCE = re.compile(r"```(?:json)?\s*\n?(.*?)```", re.S)
+_decoder = json.JSONDecoder()
+
+
+def extract_json(text: str):
+    """
+    Extract the first JSON object or array from a model reply.
+
+    Tries, in order: the whole reply, each fenced code block, and finally
+    the first position in the text where a complete JSON value can be
+    decoded. String literals are handled by the JSON decoder itself, so
+    braces inside strings do not confuse the scan.
+
+    Raises:
+        json.JSONDecodeError: If no JSON value can be found (orjson's
+            JSONDecodeError is a subclass, so callers can catch either)
+    """
+    text = text.strip()
+    try:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
+        pass
+
+    for block in _FENCE.findall(text):
+        try:
+            return orjson.loads(block.strip())
+        except orjson.JSONDecodeError:
+            continue
+
+    # orjson has no incremental decoder, so the scan uses the stdlib one
+
+    for index, char in enumerate(text):
+        if char not in "{[":
+            continue
+        try:
+            value, _ = _decoder.raw_decode(text, index)
+            return value
+        except json.JSONDecodeError:
+            continue
+
+    raise json.JSONDecodeError("No JSON value found in model response", text, 0)
+
+
+def tool_schema(name: str, description: str, model) -> dict:
+    """Build a tool definition whose input schema is a Pydantic model."""
+    return {
+        "name": name,
+        "description": description,
+        "input_schema": model.model_json_schema(),
+    }
+
+
+def response_json(response):
+    """
+    Return the structured payload of an Anthropic Message.
+
+    Forced tool calls carry their arguments as already-parsed JSON in a
+    tool_use block; plain text replies go through extract_json.
+    """
+    for block in response.content:
+        if block.type == "tool_use":
+            return block.input
+    return extract_json(response.content[0].text)
+
+
+def response_model(response, model):
+    """
+    Validate the structured payload of an Anthropic Message as a Pydantic model.
+
+    Plain text replies that are bare JSON go straight through pydantic-core's
+    JSON parser, parsing and validating in one pass; anything else falls back
+    to extract_json.
+    """
+    for block in response.content:
+        if block.type == "tool_use":
+            return model.model_validate(block.input)
+    try:
+        return model.model_validate_json(response.content[0].text)
+    except ValidationError:
+        return model.model_validate(extract_json(response.content[0].text))
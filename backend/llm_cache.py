@@ -0,0 +1,111 @@
+"""
+Exact-match cache for Anthropic responses, backed by the Supabase
+`llm_cache` table (see LLM_CACHE.sql).
+
+Entries are keyed on the model, a caller-supplied prompt version and the
+full request body, so unchanged files analyzed with an unchanged prompt
+never hit the API twice within the TTL window.
+"""
+import asyncio
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+import orjson
+from anthropic.types import Message
+
+import rate_limit
+
+CACHE_TABLE = "llm_cache"
+CACHE_TTL_DAYS = 7
+
+
+def cache_key(cache_prefix: str, **request) -> str:
+    """
+    Build the cache key for a messages.create request.
+
+    Args:
+        cache_prefix: Prompt template version, bumped whenever a prompt changes
+        **request: Keyword arguments that will be passed to messages.create
+
+    Returns:
+        Hex SHA-256 digest identifying the request
+    """
+    model = request.get("model", "")
+    content = orjson.dumps(
+        {k: v for k, v in request.items() if k != "model"},
+        option=orjson.OPT_SORT_KEYS,
+        default=str,
+    )
+    return hashlib.sha256(f"{model}|{cache_prefix}|".encode() + content).hexdigest()
+
+
+def get_cached(supabase_client, key: str) -> Optional[Message]:
+    """Return the cached response for key, or None on miss/expiry/error."""
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=CACHE_TTL_DAYS)).isoformat()
+    try:
+        result = supabase_client.table(CACHE_TABLE) \
+            .select("response") \
+            .eq("key", key) \
+            .gt("created_at", cutoff) \
+            .limit(1) \
+            .execute()
+    except Exception as e:
+        print(f"LLM cache lookup error: {e}")
+        return None
+
+    if not result.data:
+        return None
+    return Message.model_validate(result.data[0]["response"])
+
+
+def put_cached(supabase_client, key: str, response: Message) -> None:
+    """Store response under key, refreshing created_at if it already exists."""
+    try:
+        supabase_client.table(CACHE_TABLE).upsert({
+            "key": key,
+            "response": response.model_dump(mode="json"),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        }).execute()
+    except Exception as e:
+        print(f"LLM cache store error: {e}")
+
+
+def cached_messages_create(client, supabase_client, cache_prefix: str, **request) -> Message:
+    """
+    Drop-in replacement for client.messages.create(**request) that consults
+    the cache first.
+
+    Args:
+        client: Synchronous Anthropic client
+        supabase_client: Supabase client used for the cache table
+        cache_prefix: Prompt template version
+        **request: Keyword arguments for messages.create
+
+    Returns:
+        Anthropic Message, either cached or freshly generated. Replies that
+        stopped at max_tokens are returned but not cached.
+    """
+    key = cache_key(cache_prefix, **request)
+    cached = get_cached(supabase_client, key)
+    if cached is not None:
+        return cached
+
+    response = rate_limit.create(client, **request)
+    # A reply cut off at max_tokens is not worth replaying
+    if response.stop_reason != "max_tokens":
+        put_cached(supabase_client, key, response)
+    return response
+
+
+async def acached_messages_create(client, supabase_client, cache_prefix: str, **request) -> Message:
+    """Async variant of cached_messages_create for the AsyncAnthropic client."""
+    key = cache_key(cache_prefix, **request)
+    cached = await asyncio.to_thread(get_cached, supabase_client, key)
+    if cached is not None:
+        return cached
+
+    response = await rate_limit.acreate(client, **request)
+    if response.stop_reason != "max_tokens":
+        await asyncio.to_thread(put_cached, supabase_client, key, response)
+    return response
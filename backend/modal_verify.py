@@ -1,29 +1,42 @@
 import modal
+import threading
+from collections import OrderedDict
 
 # Create an image with necessary dependencies
 image = modal.Image.debian_slim(python_version="3.10") \
-    .pip_install("anthropic", "pydantic", "supabase")
+    .pip_install("anthropic", "aiolimiter", "tenacity", "orjson", "pydantic", "supabase") \
+    .add_local_python_source("batching", "db", "json_extract", "llm_cache", "rate_limit", "status_writer")
 
 app = modal.App(name="claude-verify", image=image)
 
+# Original sources of the files being processed, written by the Reader
+# (containers.run_script) under "<run_id>:<path>"
+originals = modal.Dict.from_name("dependify-originals", create_if_missing=True)
+
 # Configuration
 MAX_RETRIES = 2
 VERIFIER_MODEL = "claude-3-5-haiku-20241022"   # Haiku verifies (fast/cheap)
 ANALYZER_MODEL = "claude-sonnet-4-20250514"     # Sonnet analyzes failures (smart)
 FIXER_MODEL = "claude-3-5-haiku-20241022"       # Haiku fixes based on Sonnet's analysis
+VERIFIER_PROMPT_VERSION = "verifier-v1"
+
+# Sonnet failure analyses keyed by sha256(code + issues), kept across warm
+# invocations so a recurring failure is only analyzed once per container
+ANALYSIS_CACHE_SIZE = 256
+_analysis_cache = OrderedDict()
+# verify_one runs in several threads per container (see verify_and_fix)
+_analysis_lock = threading.Lock()
+
+# Shared by verify/analyze/fix so the system prompt and the cached
+# ORIGINAL CODE block form an identical prefix across the retry loop
+VERIFIER_SYSTEM = (
+    "You are a senior software engineer reviewing an automated code refactoring. "
+    "You will be given the original file, followed by a specific review, "
+    "analysis or repair task for the refactored version."
+)
 
 
-@app.function(
-    timeout=300,
-    max_containers=100,
-    min_containers=2,
-    secrets=[
-        modal.Secret.from_name("ANTHROPIC_API_KEY"),
-        modal.Secret.from_name("SUPABASE_URL"),
-        modal.Secret.from_name("SUPABASE_KEY"),
-    ],
-)
-def verify_and_fix(job):
+def verify_one(job):
     """
     Verification Agent: Reviews refactored code using Sonnet, and if issues
     are found, uses Haiku to fix them in a retry loop.
@@ -38,34 +51,58 @@ def verify_and_fix(job):
        d. Loop until pass or max retries
 
     Args:
-        job: Dict with file_path, original_code, refactored_code, comments
+        job: Dict with file_path, run_id, refactored_code, comments. The original
+            source is read from the originals Dict unless job carries original_code;
+            if it is in neither, the job is skipped
 
     Returns:
-        Dict with verified/fixed refactored_code and verification status
+        Dict with verified/fixed refactored_code and verification status, or
+        None if the job was skipped
     """
     from anthropic import Anthropic
     from os import getenv
-    import json
-    import supabase as sb
+    import hashlib
+    import orjson
+    from db import get_supabase_client
+    from json_extract import extract_json
+    from llm_cache import cached_messages_create
+    from status_writer import get_status_writer, job_id_for
 
     ANTHROPIC_API_KEY = getenv("ANTHROPIC_API_KEY")
-    SUPABASE_URL = getenv("SUPABASE_URL")
-    SUPABASE_KEY = getenv("SUPABASE_KEY")
 
     client = Anthropic(api_key=ANTHROPIC_API_KEY)
-    supabase_client = sb.create_client(SUPABASE_URL, SUPABASE_KEY)
+    # Shared Supabase client, kept alive across warm invocations
+    supabase_client = get_supabase_client()
+    status_writer = get_status_writer()
 
     file_path = job["file_path"]
-    original_code = job["original_code"]
+    original_code = job.get("original_code")
+    if original_code is None:
+        original_code = originals.get(f"{job.get('run_id')}:{file_path}")
+    if original_code is None:
+        # Verifying against an empty original would pass almost anything
+        print(f"No original source for {file_path}, skipping verification")
+        return None
     refactored_code = job["refactored_code"]
     comments = job.get("comments", "")
     filename = file_path.split("/")[-1]
+    # VERIFYING -> FIXING -> VERIFIED update a single row for this file
+    status_key = {"job_id": job_id_for(job.get("run_id"), file_path), "stage": "verifier"}
+
+    system = [{"type": "text", "text": VERIFIER_SYSTEM, "cache_control": {"type": "ephemeral"}}]
+
+    def original_block(original):
+        """Cached prompt block holding the original file, reused across the loop."""
+        return {
+            "type": "text",
+            "text": f"ORIGINAL CODE:\n```\n{original}\n```\n\n",
+            "cache_control": {"type": "ephemeral"},
+        }
 
     def verify_code(original, refactored):
         """Use Haiku to quickly verify the refactored code."""
         verify_prompt = (
-            "You are a code reviewer. Quickly verify this code refactoring is correct.\n\n"
-            f"ORIGINAL CODE:\n```\n{original}\n```\n\n"
+            "Quickly verify this code refactoring is correct.\n\n"
             f"REFACTORED CODE:\n```\n{refactored}\n```\n\n"
             "Check for:\n"
             "1. Does the refactored code maintain the same functionality?\n"
@@ -76,61 +113,85 @@ def verify_and_fix(job):
             '{"passed": true/false, "issues": ["list of issues found"], "confidence": 0.0-1.0}'
         )
 
-        response = client.messages.create(
+        response = cached_messages_create(
+            client,
+            supabase_client,
+            VERIFIER_PROMPT_VERSION,
             model=VERIFIER_MODEL,
             max_tokens=2048,
-            messages=[{"role": "user", "content": verify_prompt}]
+            system=system,
+            messages=[{
+                "role": "user",
+                "content": [original_block(original), {"type": "text", "text": verify_prompt}]
+            }]
         )
 
-        text = response.content[0].text.strip()
-        if "```json" in text:
-            text = text.split("```json")[1].split("```")[0].strip()
-        elif "```" in text:
-            text = text.split("```")[1].split("```")[0].strip()
-
-        return json.loads(text)
+        return extract_json(response.content[0].text)
 
     def analyze_failure(code, issues, original):
         """Use Sonnet to deeply analyze what went wrong and how to fix it."""
         analyze_prompt = (
-            "You are a senior software engineer. The following code refactoring has issues.\n"
+            "The following code refactoring has issues.\n"
             "Analyze deeply what went wrong and provide specific, actionable fix instructions.\n\n"
-            f"ORIGINAL CODE:\n```\n{original}\n```\n\n"
             f"FAULTY REFACTORED CODE:\n```\n{code}\n```\n\n"
-            f"ISSUES FOUND:\n{json.dumps(issues)}\n\n"
+            f"ISSUES FOUND:\n{orjson.dumps(issues).decode()}\n\n"
             "Return ONLY valid JSON:\n"
             '{"root_cause": "why this failed", "fix_instructions": ["step-by-step instructions for fixing"]}'
         )
 
-        response = client.messages.create(
+        response = cached_messages_create(
+            client,
+            supabase_client,
+            VERIFIER_PROMPT_VERSION,
             model=ANALYZER_MODEL,
             max_tokens=2048,
-            messages=[{"role": "user", "content": analyze_prompt}]
+            system=system,
+            messages=[{
+                "role": "user",
+                "content": [original_block(original), {"type": "text", "text": analyze_prompt}]
+            }]
         )
 
-        text = response.content[0].text.strip()
-        if "```json" in text:
-            text = text.split("```json")[1].split("```")[0].strip()
-        elif "```" in text:
-            text = text.split("```")[1].split("```")[0].strip()
-
-        return json.loads(text)
+        return extract_json(response.content[0].text)
+
+    def cached_analysis(code, issues, original):
+        """analyze_failure, memoized on the faulty code and the issues found."""
+        key = hashlib.sha256(
+            code.encode() + orjson.dumps(issues, option=orjson.OPT_SORT_KEYS)
+        ).hexdigest()
+        with _analysis_lock:
+            if key in _analysis_cache:
+                _analysis_cache.move_to_end(key)
+                return _analysis_cache[key]
+
+        analysis = analyze_failure(code, issues, original)
+        with _analysis_lock:
+            _analysis_cache[key] = analysis
+            if len(_analysis_cache) > ANALYSIS_CACHE_SIZE:
+                _analysis_cache.popitem(last=False)
+        return analysis
 
     def fix_code(code, analysis, original):
         """Use Haiku to fix code based on Sonnet's analysis."""
         fix_prompt = (
             "Fix the following refactored code based on the senior engineer's analysis.\n\n"
             f"ROOT CAUSE: {analysis.get('root_cause', 'Unknown')}\n\n"
-            f"FIX INSTRUCTIONS:\n{json.dumps(analysis.get('fix_instructions', []))}\n\n"
-            f"ORIGINAL CODE:\n```\n{original}\n```\n\n"
+            f"FIX INSTRUCTIONS:\n{orjson.dumps(analysis.get('fix_instructions', [])).decode()}\n\n"
             f"CODE TO FIX:\n```\n{code}\n```\n\n"
             "Return ONLY the complete fixed code file. No explanations, no markdown, just the code."
         )
 
-        response = client.messages.create(
+        response = cached_messages_create(
+            client,
+            supabase_client,
+            VERIFIER_PROMPT_VERSION,
             model=FIXER_MODEL,
             max_tokens=8192,
-            messages=[{"role": "user", "content": fix_prompt}]
+            system=system,
+            messages=[{
+                "role": "user",
+                "content": [original_block(original), {"type": "text", "text": fix_prompt}]
+            }]
         )
 
         fixed = response.content[0].text.strip()
@@ -144,80 +205,112 @@ def verify_and_fix(job):
         return fixed
 
     # === Verification Loop ===
-    current_code = refactored_code
+    try:
+        current_code = refactored_code
 
-    for attempt in range(MAX_RETRIES + 1):
-        # Send VERIFYING status to Supabase for real-time UI updates
-        try:
+        for attempt in range(MAX_RETRIES + 1):
+            # Send VERIFYING status to Supabase for real-time UI updates
             msg = f"🔍 Verifying {filename}"
             if attempt > 0:
                 msg += f" (retry {attempt})"
-            supabase_client.table("repo-updates").insert({
+            status_writer.emit({
+                **status_key,
                 "status": "VERIFYING",
                 "message": msg,
                 "code": current_code
-            }).execute()
-        except Exception as e:
-            print(f"Supabase error: {e}")
-
-        # Verify with Sonnet
-        try:
-            result = verify_code(original_code, current_code)
-        except Exception as e:
-            print(f"Verification parse error for {filename}: {e}")
-            # If we can't parse verification, assume it's fine
-            result = {"passed": True, "issues": [], "confidence": 0.5}
-
-        if result.get("passed", False) or result.get("confidence", 0) > 0.85:
-            # PASSED - send verified status
-            print(f"✅ {filename} passed verification (attempt {attempt + 1}, confidence: {result.get('confidence', 'N/A')})")
+            })
+
+            # Verify with Sonnet
             try:
-                supabase_client.table("repo-updates").insert({
+                result = verify_code(original_code, current_code)
+            except Exception as e:
+                print(f"Verification parse error for {filename}: {e}")
+                # If we can't parse verification, assume it's fine
+                result = {"passed": True, "issues": [], "confidence": 0.5}
+
+            if result.get("passed", False) or result.get("confidence", 0) > 0.85:
+                # PASSED - send verified status
+                print(f"✅ {filename} passed verification (attempt {attempt + 1}, confidence: {result.get('confidence', 'N/A')})")
+                status_writer.emit({
+                    **status_key,
                     "status": "VERIFIED",
                     "message": f"✅ Verified {filename}",
                     "code": current_code
-                }).execute()
-            except Exception as e:
-                print(f"Supabase error: {e}")
-
-            return {
-                "file_path": file_path,
-                "refactored_code": current_code,
-                "refactored_code_comments": comments,
-                "verified": True,
-                "attempts": attempt + 1
-            }
-
-        # FAILED - Sonnet analyzes, then Haiku fixes
-        if attempt < MAX_RETRIES:
-            issues = result.get("issues", ["Unknown issues"])
-            print(f"⚠️ {filename} failed verification: {issues}. Analyzing with Sonnet...")
-
-            try:
-                supabase_client.table("repo-updates").insert({
+                })
+
+                return {
+                    "file_path": file_path,
+                    "refactored_code": current_code,
+                    "refactored_code_comments": comments,
+                    "verified": True,
+                    "attempts": attempt + 1
+                }
+
+            # FAILED - Sonnet analyzes, then Haiku fixes
+            if attempt < MAX_RETRIES:
+                issues = result.get("issues", ["Unknown issues"])
+                print(f"⚠️ {filename} failed verification: {issues}. Analyzing with Sonnet...")
+
+                status_writer.emit({
+                    **status_key,
                     "status": "FIXING",
                     "message": f"🔧 Analyzing & fixing {filename}",
                     "code": current_code
-                }).execute()
-            except Exception:
-                pass
+                })
+
+                previous_hash = hashlib.sha256(current_code.encode()).hexdigest()
+                try:
+                    # Sonnet analyzes what went wrong
+                    analysis = cached_analysis(current_code, issues, original_code)
+                    print(f"🧠 Sonnet diagnosis: {analysis.get('root_cause', 'unknown')}")
+                    # Haiku fixes based on Sonnet's analysis
+                    current_code = fix_code(current_code, analysis, original_code)
+                except Exception as e:
+                    print(f"Fix error for {filename}: {e}")
+                    break
+
+                if hashlib.sha256(current_code.encode()).hexdigest() == previous_hash:
+                    # The fix changed nothing, so re-verifying would fail the same way
+                    print(f"⚠️ {filename} - fix made no progress, stopping early")
+                    break
+
+        # Max retries exhausted or no progress - return best attempt
+        print(f"⚠️ {filename} - giving up after {attempt + 1} attempts, using best attempt")
+        return {
+            "file_path": file_path,
+            "refactored_code": current_code,
+            "refactored_code_comments": comments,
+            "verified": False,
+            "attempts": attempt + 1
+        }
+    finally:
+        # Make sure every status row reaches Supabase before the container returns
+        status_writer.flush()
 
-            try:
-                # Sonnet analyzes what went wrong
-                analysis = analyze_failure(current_code, issues, original_code)
-                print(f"🧠 Sonnet diagnosis: {analysis.get('root_cause', 'unknown')}")
-                # Haiku fixes based on Sonnet's analysis
-                current_code = fix_code(current_code, analysis, original_code)
-            except Exception as e:
-                print(f"Fix error for {filename}: {e}")
-                break
-
-    # Max retries exhausted - return best attempt
-    print(f"⚠️ {filename} - max retries reached, using best attempt")
-    return {
-        "file_path": file_path,
-        "refactored_code": current_code,
-        "refactored_code_comments": comments,
-        "verified": False,
-        "attempts": MAX_RETRIES + 1
-    }
+
+@app.function(
+    timeout=300,
+    max_containers=100,
+    min_containers=2,
+    secrets=[
+        modal.Secret.from_name("ANTHROPIC_API_KEY"),
+        modal.Secret.from_name("SUPABASE_URL"),
+        modal.Secret.from_name("SUPABASE_KEY"),
+    ],
+)
+@modal.batched(max_batch_size=16, wait_ms=200)
+def verify_and_fix(jobs: list[dict]) -> list[dict]:
+    """
+    Modal entry point for the Verifier Agent. Callers still pass one job per
+    call; Modal folds concurrent calls into batches of up to 16, which are
+    verified in parallel threads inside a single container.
+
+    Args:
+        jobs: Jobs accepted by verify_one
+
+    Returns:
+        One verify_one result per job, in order (None for a job that failed)
+    """
+    from batching import run_batch
+
+    return run_batch(verify_one, jobs, "Verifier", "file_path")
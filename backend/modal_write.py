@@ -1,32 +1,13 @@
 import modal
-import checker
-import os
-import supabase
 
-# Create an image with all necessary dependencies
+# Create an image with only what process_file needs at runtime
 image = modal.Image.debian_slim(python_version="3.10") \
-    .apt_install("git", "python3", "bash") \
-    .pip_install("python-dotenv", "anthropic", "fastapi", "uvicorn", "modal", "pydantic", "websockets", "supabase") \
-    .add_local_python_source("checker") \
-    .add_local_python_source("modal_write") \
-    .add_local_python_source("config") \
-    .add_local_python_source("auth") \
-    .add_local_python_source("containers") \
-    .add_local_python_source("server")
+    .pip_install("anthropic", "aiolimiter", "tenacity", "orjson", "pydantic", "supabase") \
+    .add_local_python_source("batching", "db", "json_extract", "llm_cache", "rate_limit", "status_writer")
 
 app = modal.App(name="claude-write", image=image)
 
-@app.function(
-    timeout=300,  # 5 minutes per file
-    max_containers=100,  # Process up to 100 files in parallel
-    min_containers=3,  # Keep 3 containers warm for faster response
-    secrets=[
-        modal.Secret.from_name("ANTHROPIC_API_KEY"),
-        modal.Secret.from_name("SUPABASE_URL"),
-        modal.Secret.from_name("SUPABASE_KEY"),
-    ],
-)
-def process_file(job):
+def refactor_file(job):
     """
     Writer Agent: Refactors outdated code using Haiku (fast, parallel).
 
@@ -39,16 +20,18 @@ def process_file(job):
     from pydantic import BaseModel, ValidationError
     from os import getenv
     import json
-    import supabase
     from anthropic import Anthropic
+    from db import get_supabase_client
+    from json_extract import response_model, tool_schema
+    from llm_cache import cached_messages_create
+    from status_writer import get_status_writer, job_id_for
 
     # Get credentials from Modal secrets (environment variables)
     ANTHROPIC_API_KEY = getenv("ANTHROPIC_API_KEY")
-    SUPABASE_URL = getenv("SUPABASE_URL")
-    SUPABASE_KEY = getenv("SUPABASE_KEY")
 
-    # Initialize Supabase client
-    supabase_client = supabase.create_client(SUPABASE_URL, SUPABASE_KEY)
+    # Shared Supabase client, kept alive across warm invocations
+    supabase_client = get_supabase_client()
+    status_writer = get_status_writer()
 
     class JobReport(BaseModel):
         refactored_code: str
@@ -56,66 +39,98 @@ def process_file(job):
 
     # Model configuration
     WRITER_MODEL = "claude-3-5-haiku-20241022"
+    WRITER_PROMPT_VERSION = "writer-v2"
+    # Haiku's output ceiling; the rewritten file (or region) has to fit in it
+    WRITER_MAX_TOKENS = 8192
 
     # Initialize Anthropic client (Writer Agent - Haiku)
     client = Anthropic(api_key=ANTHROPIC_API_KEY)
 
     file_path = job["path"]
     code_content = job["code_content"]
+    range_of_interest = job.get("range_of_interest")
+
+    # Large files are flagged by region: only that region is rewritten and
+    # spliced back, so the reply never has to hold the whole file
+    start, end = 0, len(code_content)
+    if range_of_interest:
+        start, end = range_of_interest
+        # Widen to whole lines so the rewrite replaces complete statements
+        start = code_content.rfind("\n", 0, start) + 1
+        end = code_content.find("\n", end)
+        end = len(code_content) if end == -1 else end
+    target = code_content[start:end]
+
+    # Rough size of the rewrite (~3 chars per token) plus room for comments
+    max_tokens = len(target) // 3 + 1024
+    if max_tokens > WRITER_MAX_TOKENS:
+        print(f"Skipping {file_path}: too large for the Writer to return in full")
+        return None
+
+    if range_of_interest:
+        scope = (
+            f"The code below is an excerpt (characters {start}-{end}) of a larger file. "
+            "Rewrite only this excerpt; refactored_code must be the complete excerpt, "
+            "starting and ending at the same points, so it can be spliced back into the file."
+        )
+    else:
+        scope = "The file should be a complete file, not just a partial updated code segment."
 
     user_prompt = (
         "Analyze the following code and determine if the syntax is out of date. "
         "If it is out of date, specify what changes need to be made in the following JSON format:\n\n"
         "{\n"
-        '  "refactored_code": "A rewrite of the file that is more up to date, using the native language (i.e. if the file is a NextJS file, rewrite the NextJS file using Javascript/Typescript with the updated API changes). The file should be a complete file, not just a partial updated code segment.",\n'
+        f'  "refactored_code": "A rewrite of the code that is more up to date, using the native language (i.e. if the file is a NextJS file, rewrite the NextJS file using Javascript/Typescript with the updated API changes). {scope}",\n'
         '  "refactored_code_comments": "Comments and explanations for your code changes. Be as descriptive, informative, and technical as possible."\n'
         "}\n\n"
         f"File: {file_path}\n\n"
-        f"Code:\n{code_content}"
+        f"Code:\n{target}"
     )
 
     try:
         print(f"Processing file: {file_path}")
 
-        response = client.messages.create(
+        response = cached_messages_create(
+            client,
+            supabase_client,
+            WRITER_PROMPT_VERSION,
             model=WRITER_MODEL,
-            max_tokens=8192,
-            messages=[
+            max_tokens=max_tokens,
+            # Fixed instructions are cached server-side; only the file varies per call
+            system=[
                 {
-                    "role": "user",
-                    "content": "You are a helpful assistant that analyzes code and returns a JSON object with the refactored code and the comments that come with it. Your goal is to identify outdated syntax in code and suggest changes to update it to the latest syntax. Return ONLY valid JSON with keys: refactored_code, refactored_code_comments.\n\n" + user_prompt
+                    "type": "text",
+                    "text": "You are a helpful assistant that analyzes code and returns a JSON object with the refactored code and the comments that come with it. Your goal is to identify outdated syntax in code and suggest changes to update it to the latest syntax. Return ONLY valid JSON with keys: refactored_code, refactored_code_comments.",
+                    "cache_control": {"type": "ephemeral"}
                 }
-            ]
+            ],
+            messages=[{"role": "user", "content": user_prompt}],
+            # Force a structured reply so there are no code fences to strip
+            tools=[tool_schema("emit_job_report", "Report the refactored file and comments.", JobReport)],
+            tool_choice={"type": "tool", "name": "emit_job_report"}
         )
 
+        # A cut-off rewrite would drop the end of the code
+        if response.stop_reason == "max_tokens":
+            print(f"Writer output truncated for {file_path}")
+            return None
+
         # Parse response JSON into JobReport
-        response_text = response.content[0].text.strip()
-        if "```json" in response_text:
-            response_text = response_text.split("```json")[1].split("```")[0].strip()
-        elif "```" in response_text:
-            response_text = response_text.split("```")[1].split("```")[0].strip()
-        parsed = json.loads(response_text)
-        job_report = JobReport(**parsed)
+        job_report = response_model(response, JobReport)
+        if range_of_interest:
+            job_report.refactored_code = (
+                code_content[:start] + job_report.refactored_code + code_content[end:]
+            )
 
         # Update Supabase with progress
         filename = file_path.split("/")[-1]
-        data = {
+        status_writer.emit({
+            "job_id": job_id_for(job.get("run_id"), file_path),
+            "stage": "writer",
             "status": "WRITING",
             "message": f"✍️ Updating {filename}",
             "code": job_report.refactored_code
-        }
-
-        try:
-            supabase_client.table("repo-updates").insert(data).execute()
-        except Exception as db_error:
-            # If filename/old_code columns don't exist, try without them
-            print(f"Database error (may need to add columns): {db_error}")
-            data_fallback = {
-                "status": "WRITING",
-                "message": f"✍️ Updating {filename}",
-                "code": job_report.refactored_code
-            }
-            supabase_client.table("repo-updates").insert(data_fallback).execute()
+        })
 
         return {
             "file_path": file_path,
@@ -128,3 +143,33 @@ def process_file(job):
         # Handle any other exceptions, e.g. network errors, model issues, etc.
         print(f"Error analyzing {file_path}: {e}")
         return None
+    finally:
+        status_writer.flush()
+
+
+@app.function(
+    timeout=300,  # 5 minutes per batch; files in a batch run in parallel
+    max_containers=100,  # Up to 100 containers, each working on a batch
+    min_containers=3,  # Keep 3 containers warm for faster response
+    secrets=[
+        modal.Secret.from_name("ANTHROPIC_API_KEY"),
+        modal.Secret.from_name("SUPABASE_URL"),
+        modal.Secret.from_name("SUPABASE_KEY"),
+    ],
+)
+@modal.batched(max_batch_size=16, wait_ms=200)
+def process_file(jobs: list[dict]) -> list[dict]:
+    """
+    Modal entry point for the Writer Agent. Callers still pass one job per
+    call; Modal folds concurrent calls into batches of up to 16, which are
+    refactored in parallel threads inside a single container.
+
+    Args:
+        jobs: Jobs accepted by refactor_file
+
+    Returns:
+        One refactor_file result per job, in order (None for a job that failed)
+    """
+    from batching import run_batch
+
+    return run_batch(refactor_file, jobs, "Writer", "path")
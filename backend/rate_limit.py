@@ -0,0 +1,46 @@
+"""
+Rate limiting and 429 backoff for Anthropic calls.
+
+Async callers (the Reader) go through per-tier request limiters plus a
+shared token-per-minute budget before each call. Sync callers (the Modal
+Writer/Verifier, one file per invocation) only need the backoff. Every
+call retries with exponential backoff when Anthropic answers 429.
+"""
+from aiolimiter import AsyncLimiter
+from anthropic import RateLimitError
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
+
+# Per-process budgets. Each Modal container has its own, so keep these at
+# a fraction of the organization's limits.
+RPM_HAIKU = AsyncLimiter(1000, 60)
+RPM_SONNET = AsyncLimiter(400, 60)
+TPM = AsyncLimiter(80_000, 60)
+
+_retry_on_429 = retry(
+    retry=retry_if_exception_type(RateLimitError),
+    wait=wait_exponential(min=1, max=60),
+    stop=stop_after_attempt(5),
+    reraise=True,
+)
+
+
+def estimate_tokens(request: dict) -> int:
+    """Rough token estimate for a request: output budget plus ~4 chars per input token."""
+    prompt_chars = len(str(request.get("system", ""))) + len(str(request.get("messages", "")))
+    return request.get("max_tokens", 4096) + prompt_chars // 4
+
+
+@_retry_on_429
+async def acreate(client, **request):
+    """Rate-limited client.messages.create for the AsyncAnthropic client."""
+    limiter = RPM_SONNET if "sonnet" in request.get("model", "") else RPM_HAIKU
+    tokens = min(estimate_tokens(request), TPM.max_rate)
+    async with limiter:
+        await TPM.acquire(tokens)
+        return await client.messages.create(**request)
+
+
+@_retry_on_429
+def create(client, **request):
+    """client.messages.create for the sync Anthropic client, with 429 backoff."""
+    return client.messages.create(**request)
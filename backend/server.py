@@ -1,14 +1,23 @@
 # server.py
 from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, Depends, Query, Request
 from typing import Optional, Dict
+from collections import defaultdict
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 from docker.errors import DockerException, ContainerError
 import os
+import queue
+import logging
+import logging.handlers
 import subprocess
 import asyncio
 import json
+import orjson
+import uuid
+import hashlib
 import shutil
+import tempfile
+import aiofiles
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
@@ -18,11 +27,20 @@ from config import Config
 from auth import AuthService, get_current_user, get_optional_user
 
 # Import updated app objects from modules
-from containers import app as container_app, run_script
+from containers import app as container_app, run_script, originals, REPOSITORY_DIR
 from modal_write import app as write_app, process_file
 from modal_verify import app as verify_app, verify_and_fix
-from git_driver import load_repository, create_and_push_branch, create_pull_request, create_fork
-from socket_manager import ConnectionManager
+from git_driver import load_repository, create_and_push_branch, create_pull_request, create_fork, create_github_client
+from socket_manager import ConnectionManager, ProgressBatcher
+
+# Log records are handed to a queue and written to stderr by a listener
+# thread, so logging in the pipeline loops never blocks the event loop
+_log_queue = queue.Queue(-1)
+_log_listener = logging.handlers.QueueListener(_log_queue, logging.StreamHandler())
+logger = logging.getLogger("dependify")
+logger.setLevel(logging.INFO)
+logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+logger.propagate = False
 
 # Initialize FastAPI app with metadata
 app = FastAPI(
@@ -33,9 +51,22 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
+def _rate_limit_key(request: Request) -> str:
+    """Client address for rate limiting, as seen by the proxy in front of us."""
+    if Config.TRUST_PROXY_HEADERS:
+        # The proxy appends the address it saw; anything left of it is client-supplied
+        forwarded = request.headers.get("x-forwarded-for", "").split(",")[-1].strip()
+        client_ip = forwarded or request.headers.get("x-real-ip", "").strip()
+        if client_ip:
+            return client_ip
+    return get_remote_address(request)
+
+
 # Initialize rate limiter
-limiter = Limiter(key_func=get_remote_address)
+limiter = Limiter(key_func=_rate_limit_key)
 app.state.limiter = limiter
+# Background staging-dir removals, awaited on shutdown
+app.state.cleanup_tasks = set()
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
 # Initialize WebSocket manager
@@ -52,12 +83,18 @@ app.add_middleware(
 
 # Define request models
 class UpdateRequest(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True, frozen=True)
+
     repository: str = Field(..., description="GitHub repository URL")
     repository_owner: str = Field(..., description="Repository owner username")
     repository_name: str = Field(..., description="Repository name")
+    client_id: Optional[str] = Field(
+        None, description="Client id of the caller's /ws connection; live progress is sent only there"
+    )
 
-    @validator('repository')
-    def validate_repository_url(cls, v):
+    @field_validator('repository')
+    @classmethod
+    def validate_repository_url(cls, v: str) -> str:
         """Validate that repository URL is a valid GitHub URL."""
         if not v.startswith(('https://github.com/', 'git@github.com:')):
             raise ValueError('Repository must be a valid GitHub URL')
@@ -65,10 +102,14 @@ class UpdateRequest(BaseModel):
 
 
 class GitHubOAuthRequest(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True, frozen=True)
+
     code: str = Field(..., description="GitHub OAuth authorization code")
 
 
 class AuthResponse(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     access_token: str
     token_type: str = "bearer"
     user: Dict
@@ -96,7 +137,7 @@ async def github_oauth(request: Request, oauth_request: GitHubOAuthRequest):
     request must be a starlette.requests.Request instance for slowapi.
     """
     try:
-        github_data = await AuthService.exchange_github_code(oauth_request.code)
+        github_data = await AuthService.exchange_github_code(oauth_request.code, request.app.state.gh_client)
 
         # Create JWT token for our API
         user_data = github_data["user"]
@@ -125,6 +166,81 @@ async def get_current_user_info(current_user: Dict = Depends(get_current_user)):
     return {"user": current_user}
 
 
+async def _queue_iter(queue: asyncio.Queue):
+    """Yield items from queue until the None sentinel, as input for Modal .map.aio."""
+    while (item := await queue.get()) is not None:
+        yield item
+
+
+async def _run_stages(*stages):
+    """Run pipeline stages concurrently; if one fails, cancel the rest and re-raise."""
+    tasks = [asyncio.create_task(stage) for stage in stages]
+    try:
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+    finally:
+        for task in tasks:
+            task.cancel()
+        # Let cancelled stages unwind before the Modal apps shut down
+        await asyncio.gather(*tasks, return_exceptions=True)
+    for task in done:
+        task.result()
+
+
+async def _write_one(job: dict) -> Optional[str]:
+    """Write one refactored file into the staging clone. Returns its path, or None if skipped."""
+    file_path = job.get("path")
+
+    if not os.path.exists(file_path):
+        logger.warning(f"Warning: File {file_path} does not exist")
+        return None
+    try:
+        async with aiofiles.open(file_path, "w", encoding="utf-8") as f:
+            await f.write(job.get("new_content"))
+    except Exception as write_error:
+        logger.error(f"Error writing file {file_path}: {write_error}")
+        return None
+    logger.info(f"Updated: {file_path}")
+    return file_path
+
+
+def _staging_path(file_path: str, staging_dir: str) -> Optional[str]:
+    """
+    Map a path in the Reader's checkout onto the staging clone. Returns None
+    if the path would land outside staging_dir (e.g. through "..").
+    """
+    rel = os.path.relpath(file_path, REPOSITORY_DIR)
+    new_path = os.path.normpath(os.path.join(staging_dir, rel))
+    if os.path.commonpath([new_path, staging_dir]) != staging_dir:
+        return None
+    return new_path
+
+
+async def _drop_originals(run_id: str, paths) -> None:
+    """Best-effort removal of a run's entries from the originals Dict."""
+    async def drop(path):
+        try:
+            await originals.pop.aio(f"{run_id}:{path}")
+        except Exception as e:
+            logger.warning(f"Could not drop original of {path}: {e}")
+
+    await asyncio.gather(*(drop(path) for path in paths))
+
+
+def _build_verify_job(output: dict, jobs_by_path: Dict[str, dict]) -> dict:
+    """
+    Turn a Writer output into a Verifier job, joined with its Reader job.
+    The original source is not included: the Verifier reads it from the
+    originals Dict that run_script fills.
+    """
+    original = jobs_by_path.get(output.get("file_path"))
+    return {
+        "file_path": output["file_path"],
+        "run_id": original.get("run_id") if original else None,
+        "refactored_code": output["refactored_code"],
+        "comments": output.get("refactored_code_comments", "")
+    }
+
+
 @app.post('/update', tags=["Repository"])
 @limiter.limit(f"{Config.RATE_LIMIT_PER_HOUR}/hour")
 async def update(request: Request, payload: UpdateRequest,
@@ -142,48 +258,156 @@ async def update(request: Request, payload: UpdateRequest,
     Requires authentication for private repositories.
     """
     staging_dir = None
+    # Keys this run's progress rows across the Reader, Writer and Verifier
+    run_id = str(uuid.uuid4())
 
     try:
-        print(f"Processing repository: {payload.repository}")
-
-        # Create staging area
-        staging_dir = os.path.join(os.getcwd(), "staging")
+        logger.info(f"Processing repository: {payload.repository}")
+
+        # Create a staging area of our own so concurrent runs never share one
+        # Resolved so the containment check in _staging_path compares real paths
+        staging_dir = os.path.realpath(tempfile.mkdtemp(prefix="dependify-", dir=Config.STAGING_ROOT))
+
+        # Reader, Writer and Verifier run as one streaming pipeline: each
+        # file moves to the next stage as soon as the previous one is done
+        logger.info("Analyzing, refactoring and verifying files (Reader → Writer → Verifier)...")
+        job_list = []
+        # Reader jobs indexed by path, for O(1) joins with stage outputs
+        jobs_by_path = {}
+        # (extension, content digest) -> first path seen with that content;
+        # only that path goes through the Writer and Verifier
+        representatives = {}
+        # Representative path -> paths of identical files sharing its result
+        duplicates = defaultdict(list)
+        write_outputs = []
+        # Writer outputs identical to their input up to surrounding whitespace,
+        # applied without verification once the pipeline is done
+        noop_outputs = []
+        # (result, status) per representative, applied once the pipeline is
+        # done so identical files the Reader yields late still get a copy
+        final_results = []
+        refactored_jobs = []
+        write_q = asyncio.Queue()
+        verify_q = asyncio.Queue()
+        # Live progress for the caller's /ws connection, at most 5 messages a second
+        progress = ProgressBatcher(manager, run_id, payload.client_id, root=REPOSITORY_DIR, interval_ms=200)
+        # Files handed to each stage so far, and results it has returned
+        queued = {"writer": 0, "verifier": 0}
+        finished = {"writer": 0, "verifier": 0}
+
+        async def reader():
+            try:
+                async for job in run_script.remote_gen.aio(payload.repository, run_id):
+                    job["run_id"] = run_id
+                    job_list.append(job)
+                    jobs_by_path[job.get("path")] = job
+                    logger.info(f"📖 Read {len(job_list)}: {job.get('path', 'unknown')}")
+
+                    digest = hashlib.blake2b(job.get("code_content", "").encode(), digest_size=16).digest()
+                    key = (os.path.splitext(job.get("path", ""))[1], digest)
+                    representative = representatives.setdefault(key, job.get("path"))
+                    if representative != job.get("path"):
+                        duplicates[representative].append(job.get("path"))
+                        continue
+                    write_q.put_nowait(job)
+                    queued["writer"] += 1
+                    progress.tick("reader", done=len(job_list), file=job.get("path"))
+            finally:
+                write_q.put_nowait(None)
+
+        async def writer():
+            try:
+                # return_exceptions keeps one failed container from aborting the whole fan-out;
+                # order_outputs=False hands each result on as soon as it completes
+                async for output in process_file.map.aio(
+                    _queue_iter(write_q), return_exceptions=True, order_outputs=False
+                ):
+                    finished["writer"] += 1
+                    progress.tick(
+                        "writer",
+                        done=finished["writer"],
+                        total=queued["writer"],
+                        file=output.get("file_path") if isinstance(output, dict) else None
+                    )
+                    if isinstance(output, Exception):
+                        logger.error(f"❌ Writer error: {output}")
+                    elif output and output.get("refactored_code"):
+                        write_outputs.append(output)
+                        logger.info(f"✍️ Written {len(write_outputs)}: {output.get('file_path', 'unknown')}")
+                        original = jobs_by_path.get(output.get("file_path"))
+                        original_code = original.get("code_content", "") if original else ""
+                        if output["refactored_code"].strip() == original_code.strip():
+                            # Nothing for the Verifier to check
+                            noop_outputs.append(output)
+                            continue
+                        verify_q.put_nowait(_build_verify_job(output, jobs_by_path))
+                        queued["verifier"] += 1
+                    else:
+                        logger.warning("⚠️ Skipped: No output")
+            finally:
+                verify_q.put_nowait(None)
+
+        def add_refactored(result, status):
+            file_path = result.get("file_path", "")
+            # Identical files get the same result as their representative
+            for path in [file_path, *duplicates.get(file_path, ())]:
+                new_path = _staging_path(path, staging_dir)
+                if new_path is None:
+                    logger.warning(f"⚠️ Skipping {path}: outside the repository")
+                    continue
+                # Find original code for this file
+                original_job = jobs_by_path.get(path)
+                refactored_jobs.append({
+                    "path": new_path,
+                    "new_content": result["refactored_code"],
+                    "old_content": original_job.get("code_content", "") if original_job else "",
+                    "comments": result.get("refactored_code_comments", "")
+                })
+                logger.info(f"{status} {len(refactored_jobs)}: {path}")
+
+        async def verifier():
+            async for result in verify_and_fix.map.aio(
+                _queue_iter(verify_q), return_exceptions=True, order_outputs=False
+            ):
+                finished["verifier"] += 1
+                progress.tick(
+                    "verifier",
+                    done=finished["verifier"],
+                    total=queued["verifier"],
+                    file=result.get("file_path") if isinstance(result, dict) else None
+                )
+                if isinstance(result, Exception):
+                    logger.error(f"❌ Verifier error: {result}")
+                elif result and result.get("refactored_code"):
+                    status = "✅" if result.get("verified") else "⚠️"
+                    final_results.append((result, f"{status} Verified (attempts: {result.get('attempts', 1)})"))
+                else:
+                    logger.error("❌ Failed to verify")
 
-        # Clean up existing staging directory
-        if os.path.exists(staging_dir):
-            shutil.rmtree(staging_dir)
-        os.makedirs(staging_dir)
+        with container_app.run(), write_app.run(), verify_app.run():
+            try:
+                await _run_stages(reader(), writer(), verifier())
+            finally:
+                await progress.flush()
+                # The Verifier was the last reader of this run's originals
+                await _drop_originals(run_id, list(jobs_by_path))
 
-        # Run container-based script execution to analyze files
-        print("Step 1: Analyzing files with Reader Agent (Sonnet)...")
-        with container_app.run():
-            job_list = run_script.remote(payload.repository)
+        for result, status in final_results:
+            add_refactored(result, status)
+        for output in noop_outputs:
+            add_refactored(output, "⏭️ Unchanged, not verified")
 
         if not job_list:
             return {
                 "status": "success",
                 "message": "No outdated files found in repository",
                 "repository": payload.repository,
+                "run_id": run_id,
                 "files_analyzed": 0,
                 "files_updated": 0
             }
 
-        print(f"Found {len(job_list)} files to update")
-
-        # Step 2: Refactor files with Writer Agent (Haiku - parallel)
-        print("Step 2: Refactoring files with Writer Agent (Haiku)...")
-        write_outputs = []
-        with write_app.run():
-            print(f"⚡ Processing {len(job_list)} files in parallel...")
-            
-            i = 0
-            async for output in process_file.map.aio(job_list):
-                i += 1
-                if output and output.get("refactored_code"):
-                    write_outputs.append(output)
-                    print(f"✍️ Written {i}/{len(job_list)}: {output.get('file_path', 'unknown')}")
-                else:
-                    print(f"⚠️ Skipped {i}/{len(job_list)}: No output")
+        logger.info(f"Found {len(job_list)} files to update")
 
         if not write_outputs:
             raise HTTPException(
@@ -191,48 +415,6 @@ async def update(request: Request, payload: UpdateRequest,
                 detail="Failed to refactor any files. Please check if the repository contains valid code files."
             )
 
-        # Step 3: Verify and fix with Verifier Agent (Sonnet - parallel)
-        print("Step 3: Verifying changes with Verifier Agent (Sonnet)...")
-        verify_jobs = []
-        for output in write_outputs:
-            original = next(
-                (j for j in job_list if j.get("path") == output.get("file_path")),
-                None
-            )
-            verify_jobs.append({
-                "file_path": output["file_path"],
-                "original_code": original.get("code_content", "") if original else "",
-                "refactored_code": output["refactored_code"],
-                "comments": output.get("refactored_code_comments", "")
-            })
-
-        refactored_jobs = []
-        with verify_app.run():
-            print(f"🔍 Verifying {len(verify_jobs)} files in parallel...")
-            i = 0
-            async for result in verify_and_fix.map.aio(verify_jobs):
-                i += 1
-                if result and result.get("refactored_code"):
-                    file_path = result.get("file_path", "")
-                    new_path = (
-                        f"{staging_dir}{file_path[24:]}" if file_path and len(file_path) > 24 else os.path.join(staging_dir, os.path.basename(file_path))
-                    )
-                    # Find original code for this file
-                    original_job = next(
-                        (j for j in job_list if j.get("path") == file_path),
-                        None
-                    )
-                    refactored_jobs.append({
-                        "path": new_path,
-                        "new_content": result["refactored_code"],
-                        "old_content": original_job.get("code_content", "") if original_job else "",
-                        "comments": result.get("refactored_code_comments", "")
-                    })
-                    status = "✅" if result.get("verified") else "⚠️"
-                    print(f"{status} Verified {i}/{len(verify_jobs)}: {file_path} (attempts: {result.get('attempts', 1)})")
-                else:
-                    print(f"❌ Failed {i}/{len(verify_jobs)}")
-
         if not refactored_jobs:
             raise HTTPException(
                 status_code=400,
@@ -240,8 +422,9 @@ async def update(request: Request, payload: UpdateRequest,
             )
 
         # Create fork of the repository (or get original if user owns it)
-        print("Step 4: Checking repository ownership and creating fork if needed...")
-        fork_result = create_fork(payload.repository_owner, payload.repository_name)
+        logger.info("Step 4: Checking repository ownership and creating fork if needed...")
+        gh_client = request.app.state.gh_client
+        fork_result = await create_fork(gh_client, payload.repository_owner, payload.repository_name)
         
         if not fork_result:
             raise HTTPException(
@@ -254,41 +437,35 @@ async def update(request: Request, payload: UpdateRequest,
         repo_owner_username = fork_result.get("owner", {}).get("login")
         
         if is_own_repo:
-            print(f"User owns the repository - working directly on: {repo_url}")
+            logger.info(f"User owns the repository - working directly on: {repo_url}")
         else:
-            print(f"Fork created/found: {repo_url}")
+            logger.info(f"Fork created/found: {repo_url}")
 
         # Clone the repository (fork or original)
-        print("Step 5: Cloning repository...")
-        clone_cmd = ["git", "clone", repo_url, staging_dir]
-        result = subprocess.run(clone_cmd, capture_output=True, text=True)
+        logger.info("Step 5: Cloning repository...")
+        # Only the default branch tip is needed to commit on top of it
+        clone_cmd = ["git", "clone", "--depth=1", "--single-branch", repo_url, staging_dir]
+        proc = await asyncio.create_subprocess_exec(
+            *clone_cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        _, stderr = await proc.communicate()
 
-        if result.returncode != 0:
+        if proc.returncode != 0:
             raise HTTPException(
                 status_code=400,
-                detail=f"Failed to clone repository: {result.stderr}"
+                detail=f"Failed to clone repository: {stderr.decode(errors='replace')}"
             )
 
         # Load repository info
-        print("Step 6: Loading repository information...")
+        logger.info("Step 6: Loading repository information...")
         repo, origin, origin_url = load_repository(staging_dir)
-        files_changed = []
-
-        # Apply refactored code to files
-        print("Step 7: Applying changes...")
-        for job in refactored_jobs:
-            file_path = job.get("path")
-
-            if os.path.exists(file_path):
-                try:
-                    with open(file_path, "w", encoding="utf-8") as f:
-                        f.write(job.get("new_content"))
-                    files_changed.append(file_path)
-                    print(f"Updated: {file_path}")
-                except Exception as write_error:
-                    print(f"Error writing file {file_path}: {write_error}")
-            else:
-                print(f"Warning: File {file_path} does not exist")
+
+        # Apply refactored code to files, all writes in flight at once
+        logger.info("Step 7: Applying changes...")
+        written = await asyncio.gather(*(_write_one(job) for job in refactored_jobs))
+        files_changed = [path for path in written if path]
 
         if not files_changed:
             raise HTTPException(
@@ -297,16 +474,17 @@ async def update(request: Request, payload: UpdateRequest,
             )
 
         # Create branch and push changes
-        print("Step 8: Creating branch and pushing changes...")
-        new_branch_name, username = create_and_push_branch(repo, origin, files_changed)
+        logger.info("Step 8: Creating branch and pushing changes...")
+        new_branch_name, username = await create_and_push_branch(gh_client, repo, origin, files_changed)
 
         # Create pull request (different logic for own repo vs fork)
         if is_own_repo:
-            print("Step 9: Creating pull request in user's own repository...")
+            logger.info("Step 9: Creating pull request in user's own repository...")
         else:
-            print("Step 9: Creating pull request from fork to original repository...")
+            logger.info("Step 9: Creating pull request from fork to original repository...")
             
-        pr_url = create_pull_request(
+        pr_url = await create_pull_request(
+            gh_client,
             new_branch_name,
             payload.repository_owner,  # Original repo owner
             payload.repository_name,   # Original repo name
@@ -320,6 +498,7 @@ async def update(request: Request, payload: UpdateRequest,
             "status": "success",
             "message": "Repository updated and pull request created successfully",
             "repository": payload.repository,
+            "run_id": run_id,
             "files_analyzed": len(job_list),
             "files_updated": len(files_changed),
             "branch": new_branch_name,
@@ -350,16 +529,14 @@ async def update(request: Request, payload: UpdateRequest,
     except subprocess.CalledProcessError as pe:
         raise HTTPException(status_code=500, detail=f"Git operation failed: {str(pe)}")
     except Exception as e:
-        print(f"Unexpected error: {str(e)}")
+        logger.error(f"Unexpected error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
     finally:
-        # Cleanup staging directory
+        # Cleanup staging directory in the background so the response is not held up
         if staging_dir and os.path.exists(staging_dir):
-            try:
-                shutil.rmtree(staging_dir)
-                print("Cleaned up staging directory")
-            except Exception as cleanup_error:
-                print(f"Warning: Could not clean up staging directory: {cleanup_error}")
+            task = asyncio.create_task(asyncio.to_thread(shutil.rmtree, staging_dir, ignore_errors=True))
+            app.state.cleanup_tasks.add(task)
+            task.add_done_callback(app.state.cleanup_tasks.discard)
 
 
 @app.websocket("/ws")
@@ -375,13 +552,17 @@ async def websocket_endpoint(
     await manager.connect(websocket, client_id or "default")
     try:
         while True:
-            data = await websocket.receive_json()
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            # Accept both binary and text frames, decoded with orjson
+            data = orjson.loads(message.get("bytes") or message.get("text") or b"null")
             await manager.broadcast(data)
     except WebSocketDisconnect:
         await manager.disconnect(client_id or "default")
-        print(f"Client {client_id or 'default'} disconnected")
+        logger.info(f"Client {client_id or 'default'} disconnected")
     except Exception as e:
-        print(f"WebSocket error: {str(e)}")
+        logger.error(f"WebSocket error: {str(e)}")
         await manager.disconnect(client_id or "default")
 
 
@@ -390,21 +571,41 @@ async def startup_event():
     """
     Run validation checks on startup.
     """
-    print("=" * 60)
-    print("Starting Dependify API v2.0.0")
-    print("=" * 60)
+    _log_listener.start()
+    # One GitHub client for the process, so API calls reuse TLS connections
+    app.state.gh_client = create_github_client()
+
+    logger.info("=" * 60)
+    logger.info("Starting Dependify API v2.0.0")
+    logger.info("=" * 60)
 
     # Validate configuration
     is_valid, missing_vars = Config.validate()
     if not is_valid:
-        print(f"⚠️  WARNING: Missing environment variables: {', '.join(missing_vars)}")
-        print("Some features may not work correctly.")
+        logger.warning(f"⚠️  WARNING: Missing environment variables: {', '.join(missing_vars)}")
+        logger.warning("Some features may not work correctly.")
     else:
-        print("✅ Configuration validated successfully")
+        logger.info("✅ Configuration validated successfully")
+
+    logger.info(f"CORS allowed origins: {Config.get_allowed_origins()}")
+    logger.info(f"Rate limit: {Config.RATE_LIMIT_PER_HOUR} requests/hour")
+    logger.info("=" * 60)
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """
+    Wait for outstanding staging-dir cleanups, close the GitHub client and
+    flush logs before exiting.
+    """
+    if app.state.cleanup_tasks:
+        logger.info(f"Waiting for {len(app.state.cleanup_tasks)} staging cleanups...")
+        await asyncio.gather(*app.state.cleanup_tasks, return_exceptions=True)
+
+    await app.state.gh_client.aclose()
 
-    print(f"CORS allowed origins: {Config.get_allowed_origins()}")
-    print(f"Rate limit: {Config.RATE_LIMIT_PER_HOUR} requests/hour")
-    print("=" * 60)
+    # Flushes any queued log records
+    _log_listener.stop()
 
 
 if __name__ == '__main__':
@@ -416,5 +617,7 @@ if __name__ == '__main__':
         host="0.0.0.0",
         port=Config.PORT,
         reload=False,
-        log_level="info"
+        log_level="info",
+        loop="uvloop",  # faster scheduling for the Modal fan-out and WebSocket traffic
+        http="httptools"
     )
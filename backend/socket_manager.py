@@ -1,32 +1,116 @@
-from typing import Dict
+import os
+import asyncio
+import orjson
+from typing import Dict, Optional
 from fastapi import WebSocket
 
+# messages buffered per client before new ones are dropped for that client
+CLIENT_QUEUE_SIZE = 100
+
 
 # manages the connection across mukt clients and sate of ws
 class ConnectionManager:
     # initializes ws and adds to active connections inside of a dictionary
     def __init__(self):
         self.active_connections: Dict[str, WebSocket] = {}
+        # outgoing messages per client, drained by that client's writer task
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._writers: Dict[str, asyncio.Task] = {}
 
     # establish connection btwn a client and ws. waits for ws to start and adds accepted client to active connections
     async def connect(self, websocket: WebSocket, client_id: str):
         await websocket.accept()
+        # a reconnect under the same id replaces the old writer
+        await self.disconnect(client_id)
+        queue = asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE)
         self.active_connections[client_id] = websocket
+        self._queues[client_id] = queue
+        self._writers[client_id] = asyncio.create_task(self._writer(websocket, queue))
 
     # disconnects client from ws
     async def disconnect(self, client_id: str):
-        try:
-            del self.active_connections[client_id]
-        except KeyError:
-            pass
+        self.active_connections.pop(client_id, None)
+        self._queues.pop(client_id, None)
+        writer = self._writers.pop(client_id, None)
+        if writer is not None:
+            writer.cancel()
 
     async def send_personal_message(self, data: dict, websocket: WebSocket):
-        await websocket.send_json(data)
+        await websocket.send_bytes(orjson.dumps(data))
 
-    # shows data to all clients with active connections to the ws
+    # shows data to all clients with active connections to the ws. never waits on
+    # a client: the message is encoded once and queued, and a client whose queue
+    # is full (too slow to keep up) misses it
     async def broadcast(self, data: dict):
-        for connection in self.active_connections.values():
-            await connection.send_json(data)
+        message = orjson.dumps(data)
+        for queue in self._queues.values():
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                pass
+
+    # queues data for a single client, if it is connected; like broadcast it
+    # never waits, and the message is dropped when that client's queue is full
+    async def send_to(self, client_id: str, data: dict):
+        queue = self._queues.get(client_id)
+        if queue is None:
+            return
+        try:
+            queue.put_nowait(orjson.dumps(data))
+        except asyncio.QueueFull:
+            pass
+
+    # sends queued messages to one client until it goes away
+    @staticmethod
+    async def _writer(websocket: WebSocket, queue: asyncio.Queue):
+        try:
+            while True:
+                message = await queue.get()
+                await websocket.send_bytes(message)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"WebSocket send error: {str(e)}")
+
+
+
+# coalesces per-file pipeline progress into at most one message per interval,
+# carrying the latest count for every stage that moved since the last one.
+# progress only goes to the client that started the run (nothing is sent
+# without a client_id), and file paths are reported relative to root
+class ProgressBatcher:
+    def __init__(self, manager: ConnectionManager, run_id: str, client_id: Optional[str] = None,
+                 root: Optional[str] = None, interval_ms: int = 200):
+        self.manager = manager
+        self.run_id = run_id
+        self.client_id = client_id
+        self.root = root
+        self.interval = interval_ms / 1000
+        self._pending: Dict[str, dict] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+
+    # records progress for a stage; a message goes out within interval_ms
+    def tick(self, stage: str, done: int, total: Optional[int] = None, file: Optional[str] = None):
+        if self.client_id is None:
+            return
+        if file is not None and self.root is not None:
+            file = os.path.relpath(file, self.root)
+        self._pending[stage] = {"stage": stage, "done": done, "total": total, "file": file}
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.interval)
+        self._flush_task = None
+        await self.flush()
+
+    # sends whatever is pending right away, e.g. when the run finishes
+    async def flush(self):
+        if not self._pending:
+            return
+        events = list(self._pending.values())
+        self._pending.clear()
+        await self.manager.send_to(self.client_id, {"type": "progress", "run_id": self.run_id, "stages": events})
 
 
-manager = ConnectionManager()
\ No newline at end of file
+manager = ConnectionManager()
@@ -0,0 +1,100 @@
+"""
+Background writer for repo-updates progress rows.
+
+Status updates are queued in-process and flushed by a daemon thread as a
+single multi-row upsert, so agents never wait on a Supabase round-trip
+while they are working on a file. Rows carrying a job_id and stage are
+keyed on that pair (see ADD_JOB_STAGE_TO_SUPABASE.sql), so a retried or
+repeated update replaces the previous row instead of adding another.
+"""
+import functools
+import queue
+import threading
+import uuid
+
+from db import get_supabase_client
+
+
+def job_id_for(run_id, file_path):
+    """
+    Deterministic job id for one file in one pipeline run, shared by the
+    Reader, Writer and Verifier rows for that file.
+    """
+    if not run_id:
+        return None
+    return str(uuid.uuid5(uuid.UUID(run_id), file_path))
+
+
+class StatusWriter:
+    """Batches status rows and upserts them into Supabase off the hot path."""
+
+    def __init__(self, client, table="repo-updates", batch=50, interval=0.25):
+        """
+        Args:
+            client: Supabase client used for upserts
+            table: Table the rows are written to
+            batch: Maximum number of rows per upsert
+            interval: Seconds to wait for more rows before flushing a partial batch
+        """
+        self.client = client
+        self.table = table
+        self.batch = batch
+        self.interval = interval
+        self.q = queue.Queue()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def emit(self, row: dict):
+        """Queue a status row for insertion. Never blocks or raises."""
+        self.q.put(row)
+
+    def flush(self):
+        """Block until every row emitted so far has been written."""
+        self.q.join()
+
+    def close(self):
+        """Flush outstanding rows and stop the background thread."""
+        self.flush()
+        self._stopped.set()
+        self._thread.join()
+
+    def _drain(self):
+        rows = []
+        try:
+            rows.append(self.q.get(timeout=self.interval))
+        except queue.Empty:
+            return rows
+        while len(rows) < self.batch:
+            try:
+                rows.append(self.q.get_nowait())
+            except queue.Empty:
+                break
+        return rows
+
+    def _run(self):
+        while not self._stopped.is_set():
+            rows = self._drain()
+            if not rows:
+                continue
+            # Postgres rejects an upsert touching the same key twice, so
+            # keep only the latest row per (job_id, stage) in this batch
+            latest = {}
+            for row in rows:
+                key = (row["job_id"], row.get("stage")) if row.get("job_id") else id(row)
+                latest[key] = row
+            try:
+                self.client.table(self.table) \
+                    .upsert(list(latest.values()), on_conflict="job_id,stage") \
+                    .execute()
+            except Exception as e:
+                print(f"Supabase error writing {len(rows)} status rows: {e}")
+            finally:
+                for _ in rows:
+                    self.q.task_done()
+
+
+@functools.lru_cache(maxsize=1)
+def get_status_writer():
+    """Return the process-wide StatusWriter on the shared Supabase client."""
+    return StatusWriter(get_supabase_client())